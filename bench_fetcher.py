@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+Fetcher benchmark against a local stub PokeAPI
+Serves recorded (or synthetic) `/pokemon`, `/pokemon-species` and sprite
+fixtures from a local HTTP server with configurable latency, error rate and
+bandwidth, runs pokemon_data_fetcher.py against it once per strategy and
+reports entries/sec, per-entry latency percentiles and peak RSS.
+
+    python bench_fetcher.py record --count 50      # record fixtures from pokeapi.co
+    python bench_fetcher.py synth --count 60       # or generate synthetic ones
+    python bench_fetcher.py run --workers 1,4,8 --latency-ms 50 --error-rate 0.02
+
+Fixture layout:
+    <fixtures>/api/v2/pokemon/<id>.json
+    <fixtures>/api/v2/pokemon-species/<id>.json
+    <fixtures>/raw/<path>    sprites, mirroring raw.githubusercontent.com/<path>
+Absolute pokeapi.co and raw.githubusercontent.com URLs inside the recorded
+JSON are rewritten to point at the stub when served.
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_FIXTURES = "bench_fixtures"
+POKEAPI_ROOT = "https://pokeapi.co/api/v2/"
+SPRITE_ROOT = "https://raw.githubusercontent.com/"
+# Status codes injected by --error-rate, all in make_session's retry list
+INJECTED_ERRORS = [429, 500, 502, 503, 504]
+# Bytes written between bandwidth-limiting sleeps
+THROTTLE_CHUNK = 16 * 1024
+
+
+class StubPokeAPI:
+    """Local stand-in for pokeapi.co serving fixtures from a directory."""
+
+    def __init__(
+        self,
+        fixtures_dir,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        bandwidth=None,
+        retry_after=0,
+        max_concurrent=None,
+        seed=0,
+    ):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bandwidth = bandwidth  # bytes per second per response, None = unlimited
+        self.retry_after = retry_after
+        # Like a rate-limited server: requests beyond this many in flight get a 429
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.injected_errors = 0
+        self.bytes_sent = 0
+        self.ids = sorted(
+            int(name[: -len(".json")])
+            for name in os.listdir(os.path.join(fixtures_dir, "api", "v2", "pokemon"))
+            if name.endswith(".json")
+        )
+        self._server = None
+        self.base_url = None
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._handle(self)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = 0
+            self.injected_errors = 0
+            self.bytes_sent = 0
+
+    def _rewrite(self, body):
+        text = body.decode("utf-8")
+        text = text.replace(POKEAPI_ROOT, f"{self.base_url}/api/v2/")
+        text = text.replace(SPRITE_ROOT, f"{self.base_url}/raw/")
+        return text.encode("utf-8")
+
+    def _list_page(self, query):
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", ["20"])[0])
+        window = self.ids[offset : offset + limit]
+        next_url = None
+        if offset + limit < len(self.ids):
+            next_url = f"{self.base_url}/api/v2/pokemon?offset={offset + limit}&limit={limit}"
+        return json.dumps(
+            {
+                "count": len(self.ids),
+                "next": next_url,
+                "previous": None,
+                "results": [
+                    {"name": str(i), "url": f"{self.base_url}/api/v2/pokemon/{i}/"}
+                    for i in window
+                ],
+            }
+        ).encode("utf-8")
+
+    def _resolve(self, path, query):
+        """Return (body, content type) for a request path, or None for 404."""
+        if path.rstrip("/") == "/api/v2/pokemon":
+            return self._list_page(query), "application/json"
+        parts = path.strip("/").split("/")
+        if len(parts) == 4 and parts[:2] == ["api", "v2"]:
+            file_path = os.path.join(self.fixtures_dir, "api", "v2", parts[2], parts[3] + ".json")
+            if os.path.exists(file_path):
+                with open(file_path, "rb") as f:
+                    return self._rewrite(f.read()), "application/json"
+            return None
+        if parts[0] == "raw":
+            file_path = os.path.join(self.fixtures_dir, *parts)
+            if os.path.isfile(file_path):
+                with open(file_path, "rb") as f:
+                    body = f.read()
+                kind = "image/gif" if file_path.endswith(".gif") else "image/png"
+                return body, kind
+        return None
+
+    def _handle(self, handler):
+        with self._lock:
+            self.in_flight += 1
+        try:
+            self._respond(handler)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _respond(self, handler):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+            status = self._random.choice(INJECTED_ERRORS) if fail else None
+            if self.max_concurrent and self.in_flight > self.max_concurrent:
+                status = 429
+            if status is not None:
+                self.injected_errors += 1
+        if delay:
+            time.sleep(delay)
+
+        if status is not None:
+            handler.send_response(status)
+            if status == 429:
+                handler.send_header("Retry-After", str(self.retry_after))
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        split = urlsplit(handler.path)
+        resolved = self._resolve(split.path, parse_qs(split.query))
+        if resolved is None:
+            handler.send_response(404)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        body, content_type = resolved
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if self.bandwidth:
+            for start in range(0, len(body), THROTTLE_CHUNK):
+                chunk = body[start : start + THROTTLE_CHUNK]
+                handler.wfile.write(chunk)
+                time.sleep(len(chunk) / self.bandwidth)
+        else:
+            handler.wfile.write(body)
+        with self._lock:
+            self.bytes_sent += len(body)
+
+
+def _write_fixture(fixtures_dir, relative_path, body):
+    path = os.path.join(fixtures_dir, *relative_path.strip("/").split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+def _sprite_fixture_path(url):
+    """Fixture path for a sprite URL, or None if it is not on raw.githubusercontent.com."""
+    if not url or not url.startswith(SPRITE_ROOT):
+        return None
+    return "raw/" + url[len(SPRITE_ROOT) :]
+
+
+def record_fixtures(fixtures_dir, start=1, count=50):
+    """Record `count` entries from the live PokeAPI, starting at list position `start`."""
+    import requests
+    from pokemon_data_fetcher import find_sprite_urls
+
+    session = requests.Session()
+    session.headers.update({"User-Agent": "pokedex-data-fetcher-bench/1.0"})
+    resp = session.get(f"{POKEAPI_ROOT}pokemon?offset={start - 1}&limit={count}")
+    resp.raise_for_status()
+    species_done = set()
+    for entry in resp.json()["results"]:
+        data_resp = session.get(entry["url"])
+        data_resp.raise_for_status()
+        data = data_resp.json()
+        _write_fixture(fixtures_dir, f"api/v2/pokemon/{data['id']}.json", data_resp.content)
+
+        species_url = data.get("species", {}).get("url")
+        if species_url and species_url not in species_done:
+            species_done.add(species_url)
+            species_resp = session.get(species_url)
+            species_resp.raise_for_status()
+            species_id = species_url.rstrip("/").rsplit("/", 1)[-1]
+            _write_fixture(
+                fixtures_dir, f"api/v2/pokemon-species/{species_id}.json", species_resp.content
+            )
+
+        for url in find_sprite_urls(data):
+            fixture_path = _sprite_fixture_path(url)
+            if fixture_path:
+                sprite_resp = session.get(url)
+                if sprite_resp.status_code == 200:
+                    _write_fixture(fixtures_dir, fixture_path, sprite_resp.content)
+        print(f"Recorded #{data['id']} {data['name']}")
+
+
+def synth_fixtures(fixtures_dir, count=60, forms_every=4, seed=0):
+    """
+    Generate synthetic fixtures shaped like PokeAPI responses.
+    Every `forms_every`-th entry is an alternate form sharing an earlier
+    entry's species, and sprites are drawn so their sizes resemble real
+    official artwork PNGs and animated GIFs (some over the GIF budget).
+    """
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    stats = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+    for pokemon_id in range(1, count + 1):
+        species_id = pokemon_id
+        if pokemon_id > forms_every and pokemon_id % forms_every == 0:
+            species_id = rng.randrange(1, pokemon_id)
+        name = f"synth-{pokemon_id}"
+        png_path = f"PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/{pokemon_id}.png"
+        gif_path = f"PokeAPI/sprites/master/sprites/pokemon/versions/generation-v/black-white/animated/{pokemon_id}.gif"
+        data = {
+            "id": pokemon_id,
+            "name": name,
+            "height": rng.randrange(1, 100),
+            "weight": rng.randrange(1, 5000),
+            "species": {"name": name, "url": f"{POKEAPI_ROOT}pokemon-species/{species_id}/"},
+            "types": [{"slot": 1, "type": {"name": rng.choice(["fire", "water", "grass"])}}],
+            "abilities": [{"ability": {"name": "overgrow"}, "slot": 1}],
+            "stats": [{"base_stat": rng.randrange(20, 200), "stat": {"name": s}} for s in stats],
+            "sprites": {
+                "front_default": None,
+                "other": {"official-artwork": {"front_default": SPRITE_ROOT + png_path}},
+                "versions": {
+                    "generation-v": {
+                        "black-white": {"animated": {"front_default": SPRITE_ROOT + gif_path}}
+                    }
+                },
+            },
+            # Real entries carry a long move list, which dominates their size
+            "moves": [
+                {"move": {"name": f"move-{i}", "url": f"{POKEAPI_ROOT}move/{i}/"}}
+                for i in range(rng.randrange(20, 120))
+            ],
+        }
+        _write_fixture(
+            fixtures_dir, f"api/v2/pokemon/{pokemon_id}.json", json.dumps(data).encode("utf-8")
+        )
+        species = {
+            "id": species_id,
+            "name": name,
+            "names": [
+                {"language": {"name": lang}, "name": f"{name}-{lang}"}
+                for lang in ("ja", "ko", "zh-Hant", "en")
+            ],
+        }
+        _write_fixture(
+            fixtures_dir,
+            f"api/v2/pokemon-species/{species_id}.json",
+            json.dumps(species).encode("utf-8"),
+        )
+
+        art = Image.new("RGBA", (475, 475), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(art)
+        for _ in range(40):
+            box = sorted(rng.sample(range(40, 435), 2)), sorted(rng.sample(range(40, 435), 2))
+            draw.ellipse(
+                [box[0][0], box[1][0], box[0][1], box[1][1]],
+                fill=tuple(rng.randrange(256) for _ in range(3)) + (255,),
+            )
+        buffer = io.BytesIO()
+        art.save(buffer, "PNG")
+        _write_fixture(fixtures_dir, "raw/" + png_path, buffer.getvalue())
+
+        frames = []
+        size = rng.choice([64, 80, 96])
+        noisy = rng.random() < 0.3
+        for frame_index in range(rng.randrange(10, 40)):
+            frame = Image.new("RGB", (size, size), (255, 255, 255))
+            draw = ImageDraw.Draw(frame)
+            draw.ellipse(
+                [10 + frame_index % 6, 10, size - 10, size - 10 - frame_index % 4],
+                fill=(rng.randrange(256), 80, 40),
+            )
+            if noisy:
+                # Sprinkle noise over 40% of the pixels so the GIF compresses badly
+                noise = Image.frombytes("RGB", (size, size), rng.randbytes(size * size * 3))
+                mask = Image.frombytes("L", (size, size), rng.randbytes(size * size))
+                frame.paste(noise, mask=mask.point(lambda v: 255 if v < 102 else 0))
+            frames.append(frame)
+        buffer = io.BytesIO()
+        frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:], duration=80, loop=0)
+        _write_fixture(fixtures_dir, "raw/" + gif_path, buffer.getvalue())
+    print(f"Generated {count} synthetic entries in {fixtures_dir}")
+
+
+def run_child(rusage_path, fetcher_args):
+    """Child process: run the fetcher in-process, then record peak RSS."""
+    import resource
+    import pokemon_data_fetcher
+
+    sys.argv = ["pokemon_data_fetcher.py"] + fetcher_args
+    try:
+        pokemon_data_fetcher.main()
+    finally:
+        scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is KB on Linux
+        peak = {
+            "self_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            "children_bytes": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+        }
+        with open(rusage_path, "w") as f:
+            json.dump(peak, f)
+
+
+def run_strategy(stub, workers, extra_args, keep_output=None):
+    """Run one fetcher configuration against the stub and return its results."""
+    stub.reset_stats()
+    work_dir = tempfile.mkdtemp(prefix="pokedex-bench-")
+    try:
+        metrics_path = os.path.join(work_dir, "metrics.json")
+        rusage_path = os.path.join(work_dir, "rusage.json")
+        fetcher_args = [
+            "--api-base",
+            f"{stub.base_url}/api/v2",
+            "--output-dir",
+            os.path.join(work_dir, "pokemon"),
+            "--no-cache",
+            "--workers",
+            str(workers),
+            "--metrics-json",
+            metrics_path,
+        ] + extra_args
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "_child", rusage_path, "--"] + fetcher_args,
+            cwd=work_dir,
+            capture_output=True,
+            text=True,
+        )
+        wall = time.perf_counter() - started
+        if result.returncode != 0:
+            raise RuntimeError(f"fetcher failed with workers={workers}:\n{result.stderr}")
+
+        with open(metrics_path) as f:
+            metrics = json.load(f)
+        with open(rusage_path) as f:
+            rusage = json.load(f)
+        total = metrics["stages"].get("total", {}).get("latency", {})
+        ok = metrics["entries"]["ok"]
+        if keep_output:
+            shutil.copytree(os.path.join(work_dir, "pokemon"), keep_output, dirs_exist_ok=True)
+        return {
+            "workers": workers,
+            "wall_seconds": wall,
+            "entries_ok": ok,
+            "entries_failed": metrics["entries"]["failed"],
+            "entries_per_second": ok / wall if wall else None,
+            "entry_latency_p50": total.get("p50"),
+            "entry_latency_p99": total.get("p99"),
+            "peak_rss_mb": rusage["self_bytes"] / 1024 / 1024,
+            "compress_peak_rss_mb": rusage["children_bytes"] / 1024 / 1024,
+            "retries": sum(s["retries"] for s in metrics["stages"].values()),
+            "server_requests": stub.requests,
+            "server_injected_errors": stub.injected_errors,
+            "server_bytes": stub.bytes_sent,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def format_results(results):
+    lines = [
+        f"{'workers':>7} {'entries/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'RSS MB':>7} {'ok':>5} {'failed':>6} {'retries':>7} {'injected':>8}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r['workers']:>7} {r['entries_per_second']:>10.2f} "
+            f"{(r['entry_latency_p50'] or 0) * 1000:>8.0f} {(r['entry_latency_p99'] or 0) * 1000:>8.0f} "
+            f"{r['peak_rss_mb']:>7.1f} {r['entries_ok']:>5} {r['entries_failed']:>6} "
+            f"{r['retries']:>7} {r['server_injected_errors']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def check_regressions(results, baseline, max_regression):
+    """Compare entries/sec per worker count with a baseline run. Returns failures."""
+    previous = {r["workers"]: r for r in baseline["results"]}
+    failures = []
+    for r in results:
+        old = previous.get(r["workers"])
+        if not old or not old["entries_per_second"]:
+            continue
+        drop = 1 - r["entries_per_second"] / old["entries_per_second"]
+        if drop > max_regression:
+            failures.append(
+                f"workers={r['workers']}: {r['entries_per_second']:.2f} entries/s is "
+                f"{drop:.0%} slower than baseline {old['entries_per_second']:.2f}"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark pokemon_data_fetcher.py against a local stub PokeAPI"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="Record fixtures from the live PokeAPI")
+    record.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    record.add_argument("--start", type=int, default=1)
+    record.add_argument("--count", type=int, default=50)
+
+    synth = sub.add_parser("synth", help="Generate synthetic fixtures")
+    synth.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    synth.add_argument("--count", type=int, default=60)
+    synth.add_argument("--seed", type=int, default=0)
+
+    run = sub.add_parser("run", help="Run the benchmark")
+    run.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    run.add_argument(
+        "--workers",
+        default="1,4,8",
+        help="Comma-separated --workers values to compare (default: 1,4,8)",
+    )
+    run.add_argument("--latency-ms", type=float, default=50, help="Per-request latency (default: 50)")
+    run.add_argument("--jitter-ms", type=float, default=10, help="Random extra latency (default: 10)")
+    run.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with 429/5xx (default: 0)",
+    )
+    run.add_argument("--retry-after", type=int, default=0, help="Retry-After seconds sent with 429s")
+    run.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=0,
+        help="Answer 429 to requests beyond this many in flight, like a rate-limited server (default: off)",
+    )
+    run.add_argument(
+        "--bandwidth-kbps",
+        type=float,
+        default=0,
+        help="Per-response bandwidth cap in KB/s (default: unlimited)",
+    )
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="Write results as JSON to this path")
+    run.add_argument("--baseline", help="Previous --output file to compare against")
+    run.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="Fail if entries/sec drops more than this fraction below the baseline (default: 0.2)",
+    )
+    run.add_argument(
+        "fetcher_args",
+        nargs=argparse.REMAINDER,
+        help="Extra arguments passed to the fetcher after '--'",
+    )
+
+    # Internal entry point used by run_strategy
+    if len(sys.argv) > 2 and sys.argv[1] == "_child":
+        separator = sys.argv.index("--")
+        run_child(sys.argv[2], sys.argv[separator + 1 :])
+        return
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record_fixtures(args.fixtures, args.start, args.count)
+        return
+    if args.command == "synth":
+        synth_fixtures(args.fixtures, args.count, seed=args.seed)
+        return
+
+    if not os.path.isdir(os.path.join(args.fixtures, "api", "v2", "pokemon")):
+        print(f"No fixtures in {args.fixtures}, generating synthetic ones...")
+        synth_fixtures(args.fixtures, seed=args.seed)
+
+    extra_args = [a for a in args.fetcher_args if a != "--"]
+    stub = StubPokeAPI(
+        args.fixtures,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        bandwidth=args.bandwidth_kbps * 1024 if args.bandwidth_kbps else None,
+        retry_after=args.retry_after,
+        max_concurrent=args.max_concurrent or None,
+        seed=args.seed,
+    )
+    base_url = stub.start()
+    print(
+        f"Stub PokeAPI at {base_url}: {len(stub.ids)} entries, "
+        f"{args.latency_ms:.0f}ms latency, {args.error_rate:.0%} errors, "
+        f"{f'{args.bandwidth_kbps:.0f}KB/s' if args.bandwidth_kbps else 'unlimited'} bandwidth"
+    )
+    results = []
+    try:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            result = run_strategy(stub, workers, extra_args)
+            results.append(result)
+            print(
+                f"workers={workers}: {result['entries_per_second']:.2f} entries/s "
+                f"in {result['wall_seconds']:.1f}s"
+            )
+    finally:
+        stub.stop()
+
+    print()
+    print(format_results(results))
+    report = {
+        "fixtures": args.fixtures,
+        "entries": len(stub.ids),
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate,
+        "max_concurrent": args.max_concurrent,
+        "bandwidth_kbps": args.bandwidth_kbps,
+        "fetcher_args": extra_args,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = check_regressions(results, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"❌ {failure}")
+        if failures:
+            raise SystemExit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
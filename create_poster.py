@@ -1,56 +1,134 @@
 #!/usr/bin/env python3
 """
 Pokemon Poster Generator - 60x90cm Optimized Layout
-Creates a poster with all 151 original Pokemon arranged in optimized grid:
+By default creates a poster with all 151 original Pokemon arranged in the
+classic grid:
 - Row 1: 6 Pokemon + Pokemon Logo (7 positions)
 - Rows 2-11: 10 Pokemon each (100 total)  
 - Rows 12-16: 9 Pokemon each (45 total)
 Total: 151 Pokemon perfectly arranged
+Any other set of IDs (a generation, the National Dex) is packed into the
+grid that gives the largest sprites on the chosen paper size.
 """
 
 import json
 import os
+import time
+import hashlib
+import sqlite3
 import argparse
 from PIL import Image, ImageDraw, ImageFont
 import math
-
-
-def load_pokemon_data(pokemon_id, lang="en"):
-    """Load Pokemon data from JSON file with language support"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pokedex_db import DEFAULT_NAME as DB_NAME, PokedexDB
+from poster_assets import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_MAX_BYTES,
+    AssetCache,
+    file_sha256,
+    load_logo,
+    load_thumbnail,
+)
+from poster_layout import (
+    CLASSIC_151,
+    DPI,
+    GENERATIONS,
+    PAPER_SIZES,
+    format_ids,
+    grid_layout,
+    paper_pixels,
+    parse_ids,
+    preset_layout,
+    scale_layout,
+    scan_sprites,
+)
+from poster_strips import PNGStripWriter, TIFFStripWriter
+
+# SQLite catalog kept by the fetcher, opened on first use (False: not available)
+_pokedex_db = None
+
+
+def open_pokedex_db():
+    """
+    Return the fetcher's SQLite catalog opened read-only, or None if it has
+    not been built or cannot be read (names then come from the JSON files).
+    """
+    global _pokedex_db
+    if _pokedex_db is None:
+        _pokedex_db = False
+        db_path = os.path.join("pokemon", DB_NAME)
+        if os.path.exists(db_path):
+            try:
+                _pokedex_db = PokedexDB(db_path, readonly=True)
+            except (ValueError, sqlite3.Error) as e:
+                print(f"⚠️  Not using the SQLite catalog: {e}; reading JSON files instead")
+    return _pokedex_db or None
+
+
+def load_pokemon_json(pokemon_id):
+    """The fetcher's JSON for pokemon_id, or None if there is none."""
     json_path = f"pokemon/{pokemon_id}.json"
-    if os.path.exists(json_path):
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Try to get the name in the specified language
-            if "names" in data and isinstance(data["names"], dict):
-                name = data["names"].get(lang)
-                if name:
-                    return name
-            # Fallback to default name field
-            return data.get("name", f"Pokemon #{pokemon_id}")
+    if not os.path.exists(json_path):
+        return None
+    with open(json_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def pokemon_name(pokemon_id, data, lang):
+    """Name in lang from an entry's data, falling back to its default name."""
+    if data is not None:
+        # Try to get the name in the specified language
+        if "names" in data and isinstance(data["names"], dict):
+            name = data["names"].get(lang)
+            if name:
+                return name
+        # Fallback to default name field
+        return data.get("name", f"Pokemon #{pokemon_id}")
     return f"Pokemon #{pokemon_id}"
 
 
-def paste_pokeball_logo(poster, x, y, width, height):
-    """Loads the Pokeball logo, makes its background transparent, and pastes it."""
+def load_pokemon_data(pokemon_id, lang="en"):
+    """Load Pokemon data from the SQLite catalog or JSON file with language support"""
+    db = open_pokedex_db()
+    data = db.get(pokemon_id) if db else None
+    if data is None:
+        data = load_pokemon_json(pokemon_id)
+    return pokemon_name(pokemon_id, data, lang)
+
+
+def load_pokemon_names(pokemon_ids, langs):
+    """
+    Names for every ID in every language in one pass, as {lang: {id: name}},
+    with the same fallbacks as load_pokemon_data.
+    """
+    names = {lang: {} for lang in langs}
+    db = open_pokedex_db()
+    if db:
+        for lang in langs:
+            names[lang] = db.names(lang, pokemon_ids)
+    for pokemon_id in pokemon_ids:
+        missing = [lang for lang in langs if pokemon_id not in names[lang]]
+        if not missing:
+            continue
+        # One read of the JSON (or catalog entry) serves every missing language
+        data = db.get(pokemon_id) if db else None
+        if data is None:
+            data = load_pokemon_json(pokemon_id)
+        for lang in missing:
+            names[lang][pokemon_id] = pokemon_name(pokemon_id, data, lang)
+    return names
+
+
+def paste_pokeball_logo(poster, x, y, width, height, cache=None, logo_img=None):
+    """
+    Loads the Pokeball logo, makes its background transparent, and pastes it.
+    logo_img is an already prepared logo (see render_cell).
+    """
     try:
-        logo_img = Image.open("assets/logo.png")
-
-        # --- New background removal logic ---
-        logo_img = logo_img.convert("RGBA")
-        datas = logo_img.getdata()
-        newData = []
-        for item in datas:
-            # If pixel is close to white, make it transparent
-            if item[0] >= 245 and item[1] >= 245 and item[2] >= 245:
-                newData.append((255, 255, 255, 0))
-            else:
-                newData.append(item)
-        logo_img.putdata(newData)
-        # --- End of new logic ---
-
-        # Resize to fit the cell, preserving aspect ratio
-        logo_img.thumbnail((width, height), Image.Resampling.LANCZOS)
+        if logo_img is None:
+            # Near-white background keyed out and resized to fit the cell,
+            # preserving aspect ratio (reused from the asset cache when possible)
+            logo_img = load_logo("assets/logo.png", width, height, cache)
 
         # Calculate position to center it
         img_x = x + (width - logo_img.width) // 2
@@ -70,291 +148,710 @@ def paste_pokeball_logo(poster, x, y, width, height):
         print(f"Error pasting Pokeball logo: {e}")
 
 
-def create_pokemon_poster(lang="en"):
-    """Create optimized Pokemon poster 60x90cm"""
-    # Poster specifications for A1 size at 300 DPI
-    DPI = 300
-    WIDTH_CM = 59.4
-    HEIGHT_CM = 84.1
-    POSTER_WIDTH = int(WIDTH_CM * DPI / 2.54)
-    POSTER_HEIGHT = int(HEIGHT_CM * DPI / 2.54)
-
-    print(
-        f"Creating poster: {POSTER_WIDTH}x{POSTER_HEIGHT} pixels ({WIDTH_CM}x{HEIGHT_CM}cm at {DPI} DPI)"
-    )
+# Fonts tried in order - with Chinese support
+FONT_PATHS = [
+    "/usr/share/fonts/opentype/noto/NotoSerifCJK-Bold.ttc",
+    "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/usr/share/fonts/truetype/arphic/uming.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+]
 
-    # Layout configuration
-    BORDER_WIDTH = 150
-    TITLE_HEIGHT = 0
 
-    # Available space for Pokemon grid
-    GRID_WIDTH = POSTER_WIDTH - (2 * BORDER_WIDTH)
-    GRID_HEIGHT = POSTER_HEIGHT - TITLE_HEIGHT - (2 * BORDER_WIDTH)
+def find_font_path():
+    """First available font from FONT_PATHS, or None to use Pillow's default."""
+    for font_path in FONT_PATHS:
+        if os.path.exists(font_path):
+            return font_path
+    return None
 
-    # Row specifications
-    TOTAL_ROWS = 16
-    ROW_HEIGHT = GRID_HEIGHT // TOTAL_ROWS
 
-    # Column specifications for different row types
-    ROW1_COLS = 7  # 6 Pokemon + 1 Logo
-    MIDDLE_COLS = 10  # Rows 2-11
-    BOTTOM_COLS = 9  # Rows 12-16
+def load_fonts(font_path, name_size=36):
+    """Return (title_font, name_font) for font_path, falling back to the default font."""
+    try:
+        if font_path:
+            return ImageFont.truetype(font_path, 72), ImageFont.truetype(font_path, name_size)
+        raise Exception("No suitable font found")
+    except Exception:
+        return ImageFont.load_default(), ImageFont.load_default()
+
+
+# Per-process state for render_cell, set by _init_cell_worker
+_cell_cache = None
+
+
+def _init_cell_worker(cache):
+    global _cell_cache
+    _cell_cache = cache
+
+
+def render_cell(cell):
+    """
+    Do the expensive, independent part of one cell: decode and resample its
+    sprite (or the logo). Returns a tile dict that paste_tile composites
+    onto the poster, or None for a cell marked missing.
+    """
+    cache = _cell_cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    tile = {"image": None, "error": None}
+    if cell["id"] is None:
+        try:
+            tile["image"] = load_logo(
+                "assets/logo.png", cell["width"], cell["height"], cache
+            )
+        except Exception:
+            # paste_pokeball_logo reports the problem when compositing
+            pass
+    else:
+        if cell.get("missing"):
+            return None
+        pokemon_path = f"pokemon/{cell['id']}.png"
+        try:
+            tile["image"] = load_thumbnail(pokemon_path, cell["size"], cache)
+        except Exception as e:
+            tile["error"] = str(e)
+    if cache is not None:
+        tile["cache_hits"] = cache.hits - hits
+        tile["cache_misses"] = cache.misses - misses
+    return tile
+
+
+def cell_pool(cache=None, workers=None):
+    """Process pool for render_cells, or None when rendering serially."""
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers <= 1:
+        _init_cell_worker(cache)
+        return None
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_cell_worker,
+        initargs=(cache,),
+    )
 
-    # Pokemon image sizes (adjust based on available space)
-    POKEMON_SIZE_ROW1 = min(GRID_WIDTH // ROW1_COLS - 20, ROW_HEIGHT - 85)
-    POKEMON_SIZE_MIDDLE = min(GRID_WIDTH // MIDDLE_COLS - 10, ROW_HEIGHT - 85)
-    POKEMON_SIZE_BOTTOM = min(GRID_WIDTH // BOTTOM_COLS - 15, ROW_HEIGHT - 85)
 
-    # Colors - Pokemon theme
-    BACKGROUND_COLOR = (252, 250, 245)
-    BORDER_COLOR = (60, 90, 150)
-    TEXT_COLOR = (50, 50, 50)  # Dark gray
-
-    print(
-        f"Pokemon sizes - Row1: {POKEMON_SIZE_ROW1}px, Middle: {POKEMON_SIZE_MIDDLE}px, Bottom: {POKEMON_SIZE_BOTTOM}px"
+def render_cells(cells, cache=None, workers=None, pool=None):
+    """
+    render_cell for every cell, in order. With more than one worker the
+    cells are spread over a process pool (default: one process per core);
+    pass a pool from cell_pool to reuse it across calls.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if pool is None:
+        pool = cell_pool(cache, workers)
+        if pool is None:
+            return [render_cell(cell) for cell in cells]
+        with pool:
+            return render_cells(cells, cache, workers, pool)
+
+    tiles = list(
+        pool.map(render_cell, cells, chunksize=max(1, len(cells) // (workers * 4)))
     )
-
-    # Create poster image
-    poster = Image.new("RGB", (POSTER_WIDTH, POSTER_HEIGHT), BACKGROUND_COLOR)
+    if cache is not None:
+        # Each worker counted on its own copy of the cache
+        for tile in tiles:
+            if tile:
+                cache.hits += tile["cache_hits"]
+                cache.misses += tile["cache_misses"]
+    return tiles
+
+
+def draw_border(poster, size, border_width, color, top=0, scale=1):
+    """
+    Draw the decorative border of a size poster. poster may be a band of it
+    whose first row is row `top` of the poster. border_width is the full
+    size one; scale shrinks the rings for a preview.
+    """
     draw = ImageDraw.Draw(poster)
-
-    # Draw decorative border
-    for i in range(BORDER_WIDTH // 4):
+    width, height = size
+    line_width = max(1, round(3 * scale))
+    for i in range(border_width // 4):
+        inset = round(i * 2 * scale)
         draw.rectangle(
-            [i * 2, i * 2, POSTER_WIDTH - 1 - (i * 2), POSTER_HEIGHT - 1 - (i * 2)],
-            outline=BORDER_COLOR,
-            width=3,
+            [inset, inset - top, width - 1 - inset, height - 1 - inset - top],
+            outline=color,
+            width=line_width,
         )
 
-    # Load fonts - with Chinese support
-    try:
-        # Try to find Chinese-capable fonts first
-        chinese_fonts = [
-            "/usr/share/fonts/opentype/noto/NotoSerifCJK-Bold.ttc",
-            "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
-            "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
-            "/usr/share/fonts/truetype/arphic/uming.ttc",
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        ]
-
-        font_found = None
-        for font_path in chinese_fonts:
-            if os.path.exists(font_path):
-                font_found = font_path
-                break
-
-        if font_found:
-            title_font = ImageFont.truetype(font_found, 72)
-            name_font = ImageFont.truetype(font_found, 36)
-        else:
-            raise Exception("No suitable font found")
-    except:
-        title_font = ImageFont.load_default()
-        name_font = ImageFont.load_default()
-
-    # Title removed by user request
-
-    # Starting positions
-    grid_start_x = BORDER_WIDTH
-    grid_start_y = BORDER_WIDTH + TITLE_HEIGHT
-
-    pokemon_id = 1
-
-    # ROW 1: 6 Pokemon + Pokemon Logo (positions 1-6 + logo)
-    row_y = grid_start_y
-    cell_width_row1 = GRID_WIDTH // ROW1_COLS
-
-    print("Processing Row 1: 6 Pokemon + Logo...")
 
-    # Track Pokemon for Row 1 - we want Pokemon 1,2,3,4,5,6 and logo in center
-    row1_pokemon_positions = [1, 2, 3, None, 4, 5, 6]  # None = logo position
-
-    for col in range(ROW1_COLS):
-        cell_x = grid_start_x + (col * cell_width_row1)
-        cell_center_x = cell_x + cell_width_row1 // 2
-
-        if col == 3:  # Center position for Pokemon logo
-            paste_pokeball_logo(poster, cell_x, row_y, cell_width_row1, ROW_HEIGHT)
+def paste_tile(poster, cell, tile, cache=None, top=0):
+    """
+    Composite the sprite (or logo) of one rendered cell onto the poster,
+    or onto a band of it starting at row `top`.
+    """
+    if cell["id"] is None:
+        paste_pokeball_logo(
+            poster, cell["x"], cell["y"] - top, cell["width"], cell["height"], cache, tile["image"]
+        )
+        return
+    if tile is None:
+        return
+    if tile["error"]:
+        print(f"Error loading Pokemon #{cell['id']}: {tile['error']}")
+        return
+
+    pokemon_img = tile["image"]
+    # Center image in cell with balanced spacing
+    img_x = cell["x"] + cell["width"] // 2 - pokemon_img.width // 2
+    img_y = cell["sprite_y"] - top  # Consistent top margin
+    poster.paste(pokemon_img, (img_x, img_y), pokemon_img)
+
+
+def draw_captions(poster, cells, tiles, names, font, text_color, top=0):
+    """
+    Draw '#001 Name' under every sprite that was pasted, names being
+    {id: name}. top is as for paste_tile.
+    """
+    draw = ImageDraw.Draw(poster)
+    for cell, tile in zip(cells, tiles):
+        if cell["id"] is None or tile is None or tile["error"]:
+            continue
+        # Add Pokemon number and name on same line with proper spacing
+        combined_text = f"#{cell['id']:03d} {names[cell['id']]}"
+        text_bbox = draw.textbbox((0, 0), combined_text, font=font)
+        text_width = text_bbox[2] - text_bbox[0]
+        text_x = cell["x"] + cell["width"] // 2 - text_width // 2
+        # Consistent spacing from image
+        text_y = cell["sprite_y"] - top + tile["image"].height + cell["caption_gap"]
+        draw.text((text_x, text_y), combined_text, fill=text_color, font=font)
+
+
+# Output formats by file extension
+FORMATS = ("png", "tif", "jpg")
+FORMAT_NAMES = {"png": "PNG", "tif": "TIFF", "jpg": "JPEG"}
+# Rows per band when a format is streamed from the shared poster
+ENCODE_BAND_HEIGHT = 512
+
+
+def encode_poster(poster, path, fmt, background_color, png_level=None):
+    """
+    Encode poster to path in one of FORMATS. png_level None means the
+    smallest PNG (optimize); lower levels are faster, for drafts.
+    """
+    if fmt == "png":
+        # Save as PNG (with transparency support)
+        if png_level is None:
+            poster.save(path, "PNG", optimize=True)
         else:
-            # Get the Pokemon ID for this position
-            current_pokemon = row1_pokemon_positions[col]
-
-            pokemon_path = f"pokemon/{current_pokemon}.png"
-            if os.path.exists(pokemon_path):
-                try:
-                    pokemon_img = Image.open(pokemon_path)
-                    if pokemon_img.mode != "RGBA":
-                        pokemon_img = pokemon_img.convert("RGBA")
-
-                    pokemon_img.thumbnail(
-                        (POKEMON_SIZE_ROW1, POKEMON_SIZE_ROW1), Image.Resampling.LANCZOS
-                    )
-
-                    # Center image in cell with balanced spacing
-                    img_x = cell_center_x - pokemon_img.width // 2
-                    img_y = row_y + 10  # Consistent top margin
-
-                    poster.paste(pokemon_img, (img_x, img_y), pokemon_img)
-
-                    # Add Pokemon number and name on same line with proper spacing
-                    pokemon_name = load_pokemon_data(current_pokemon, lang)
-                    combined_text = f"#{current_pokemon:03d} {pokemon_name}"
-                    text_bbox = draw.textbbox((0, 0), combined_text, font=name_font)
-                    text_width = text_bbox[2] - text_bbox[0]
-                    text_x = cell_center_x - text_width // 2
-                    text_y = (
-                        img_y + pokemon_img.height + 15
-                    )  # Consistent spacing from image
-
-                    draw.text(
-                        (text_x, text_y), combined_text, fill=TEXT_COLOR, font=name_font
-                    )
-
-                except Exception as e:
-                    print(f"Error loading Pokemon #{current_pokemon}: {e}")
-
-    # Set pokemon_id to 7 for the next rows
-    pokemon_id = 7
-
-    # ROWS 2-11: 10 Pokemon each (Pokemon #7-106)
-    print("Processing Rows 2-11: 10 Pokemon each...")
-    cell_width_middle = GRID_WIDTH // MIDDLE_COLS
-
-    for row in range(2, 12):  # Rows 2-11
-        row_y = grid_start_y + (row - 1) * ROW_HEIGHT
+            poster.save(path, "PNG", compress_level=png_level)
+    elif fmt == "tif":
+        # Save as TIFF (high quality, lossless)
+        poster.save(path, "TIFF", compression="tiff_lzw")
+    else:
+        # Save as JPEG (smaller file size); it has no transparency, so only
+        # a poster that is not RGB already needs converting
+        if poster.mode != "RGB":
+            poster_rgb = Image.new("RGB", poster.size, background_color)
+            poster_rgb.paste(poster, mask=poster.split()[-1] if poster.mode == "RGBA" else None)
+            poster = poster_rgb
+        poster.save(path, "JPEG", quality=95, optimize=True)
+
+
+def stream_poster(poster, path, fmt, png_level=None, band_height=ENCODE_BAND_HEIGHT):
+    """
+    Encode an RGB poster to path as PNG or TIFF with the strip writers,
+    reading it band by band; only one band is copied at a time.
+    """
+    width, height = poster.size
+    if fmt == "png":
+        writer = PNGStripWriter(path, width, height, 9 if png_level is None else png_level)
+    else:
+        writer = TIFFStripWriter(path, width, height, band_height)
+    for top in range(0, height, band_height):
+        writer.write(poster.crop((0, top, width, min(height, top + band_height))))
+    writer.close()
+
+
+def save_poster(poster, base_filename, background_color, formats=FORMATS, png_level=None):
+    """
+    Save the poster in formats (default PNG, TIFF and JPEG), encoding them
+    concurrently from the one image. Returns the output paths.
+    """
+    # Image.save keeps per-call state on the image, so only one thread may
+    # call it: JPEG if selected, as it cannot be streamed, else the first
+    # format. The others stream bands out of the poster with the strip
+    # writers, which only read it, instead of each needing a full copy.
+    direct = "jpg" if "jpg" in formats else formats[0]
+    # The strip writers take RGB only; anything else is saved one format at a time
+    streamable = poster.mode == "RGB"
+    # Load before the threads share it, so none of them triggers a lazy load
+    poster.load()
+
+    def encode(fmt):
+        path = f"{base_filename}.{fmt}"
+        started = time.perf_counter()
+        if fmt == direct or not streamable:
+            encode_poster(poster, path, fmt, background_color, png_level)
+        else:
+            stream_poster(poster, path, fmt, png_level)
+        return path, time.perf_counter() - started
 
-        for col in range(MIDDLE_COLS):
-            if pokemon_id > 151:
-                break
+    # Pillow releases the GIL while encoding, so the formats overlap
+    with ThreadPoolExecutor(max_workers=len(formats) if streamable else 1) as pool:
+        results = list(pool.map(encode, formats))
+    for fmt, (path, seconds) in zip(formats, results):
+        print(f"✅ {FORMAT_NAMES[fmt]} saved: {path} ({format_size(path)} in {seconds:.1f}s)")
+    return [path for path, _ in results]
 
-            cell_x = grid_start_x + (col * cell_width_middle)
-            cell_center_x = cell_x + cell_width_middle // 2
 
-            pokemon_path = f"pokemon/{pokemon_id}.png"
-            if os.path.exists(pokemon_path):
-                try:
-                    pokemon_img = Image.open(pokemon_path)
-                    if pokemon_img.mode != "RGBA":
-                        pokemon_img = pokemon_img.convert("RGBA")
+def format_size(path):
+    return f"{os.path.getsize(path) / 1024 / 1024:.1f}MB"
 
-                    pokemon_img.thumbnail(
-                        (POKEMON_SIZE_MIDDLE, POKEMON_SIZE_MIDDLE),
-                        Image.Resampling.LANCZOS,
-                    )
 
-                    img_x = cell_center_x - pokemon_img.width // 2
-                    img_y = row_y + 10  # Balanced space from top
+def cells_crossing(cells, top, bottom):
+    """Indexes of the cells that overlap poster rows top..bottom-1."""
+    return [
+        index
+        for index, cell in enumerate(cells)
+        if cell["y"] < bottom and cell["y"] + cell["height"] > top
+    ]
 
-                    poster.paste(pokemon_img, (img_x, img_y), pokemon_img)
 
-                    # Add Pokemon number and name on same line with better spacing
-                    pokemon_name = load_pokemon_data(pokemon_id, lang)
-                    combined_text = f"#{pokemon_id:03d} {pokemon_name}"
-                    text_bbox = draw.textbbox((0, 0), combined_text, font=name_font)
-                    text_width = text_bbox[2] - text_bbox[0]
-                    text_x = cell_center_x - text_width // 2
-                    text_y = (
-                        img_y + pokemon_img.height + 15
-                    )  # Consistent spacing from image
+def render_band(size, top, bottom, cells, tiles, border_width, colors, cache=None, scale=1):
+    """
+    Rows top..bottom-1 of a size poster with border and sprites but no
+    captions, from tiles ({index: tile}) of the cells crossing them.
+    colors is (background, border, text); scale is as for draw_border.
+    """
+    background_color, border_color, _ = colors
+    band = Image.new("RGB", (size[0], bottom - top), background_color)
+    draw_border(band, size, border_width, border_color, top, scale)
+    for index in cells_crossing(cells, top, bottom):
+        paste_tile(band, cells[index], tiles[index], cache, top)
+    return band
 
-                    draw.text(
-                        (text_x, text_y), combined_text, fill=TEXT_COLOR, font=name_font
-                    )
 
-                except Exception as e:
-                    print(f"Error loading Pokemon #{ pokemon_id}: {e}")
+# Inputs of every cell of a saved poster, next to it as <output>.cells.json
+CELL_MANIFEST_VERSION = 1
 
-            pokemon_id += 1
 
-        if row % 2 == 0:
-            print(f"Completed row {row}, up to Pokemon #{pokemon_id-1}")
+def cell_manifest_path(base_filename):
+    return f"{base_filename}.cells.json"
 
-    # ROWS 12-16: 9 Pokemon each (Pokemon #107-151)
-    print("Processing Rows 12-16: 9 Pokemon each...")
-    cell_width_bottom = GRID_WIDTH // BOTTOM_COLS
 
-    for row in range(12, 17):  # Rows 12-16
-        row_y = grid_start_y + (row - 1) * ROW_HEIGHT
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
 
-        for col in range(BOTTOM_COLS):
-            if pokemon_id > 151:
-                break
 
-            cell_x = grid_start_x + (col * cell_width_bottom)
-            cell_center_x = cell_x + cell_width_bottom // 2
-
-            pokemon_path = f"pokemon/{pokemon_id}.png"
-            if os.path.exists(pokemon_path):
-                try:
-                    pokemon_img = Image.open(pokemon_path)
-                    if pokemon_img.mode != "RGBA":
-                        pokemon_img = pokemon_img.convert("RGBA")
-
-                    pokemon_img.thumbnail(
-                        (POKEMON_SIZE_BOTTOM, POKEMON_SIZE_BOTTOM),
-                        Image.Resampling.LANCZOS,
-                    )
-
-                    img_x = cell_center_x - pokemon_img.width // 2
-                    img_y = row_y + 10  # Balanced space from top
-
-                    poster.paste(pokemon_img, (img_x, img_y), pokemon_img)
+def cell_keys(cells, names, sprite_hashes, logo_hash):
+    """
+    One hash per cell over everything that decides its pixels: geometry,
+    sprite content (logo_hash for the logo) and caption.
+    """
+    keys = []
+    for cell in cells:
+        if cell["id"] is None:
+            source, caption = logo_hash, None
+        else:
+            source, caption = sprite_hashes.get(cell["id"]), names[cell["id"]]
+        keys.append(_digest([cell, source, caption]))
+    return keys
 
-                    # Add Pokemon number and name on same line with better spacing
-                    pokemon_name = load_pokemon_data(pokemon_id, lang)
-                    combined_text = f"#{pokemon_id:03d} {pokemon_name}"
-                    text_bbox = draw.textbbox((0, 0), combined_text, font=name_font)
-                    text_width = text_bbox[2] - text_bbox[0]
-                    text_x = cell_center_x - text_width // 2
-                    text_y = (
-                        img_y + pokemon_img.height + 15
-                    )  # Consistent spacing from image
 
-                    draw.text(
-                        (text_x, text_y), combined_text, fill=TEXT_COLOR, font=name_font
+def load_cell_manifest(base_filename, poster_key, size):
+    """
+    The manifest of a previous render of base_filename, if it was made with
+    the same poster-wide inputs and its lossless image is still there.
+    """
+    try:
+        with open(cell_manifest_path(base_filename), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        manifest.get("version") != CELL_MANIFEST_VERSION
+        or manifest.get("poster") != poster_key
+        or not manifest.get("image")
+    ):
+        return None
+    try:
+        with Image.open(manifest["image"]) as previous:
+            if previous.size != size or previous.mode != "RGB":
+                return None
+    except OSError:
+        return None
+    return manifest
+
+
+def save_cell_manifest(base_filename, poster_key, keys, paths):
+    """Record the cell keys of the files just written (the first PNG or TIFF is reused later)."""
+    lossless = [path for path in paths if path.endswith((".png", ".tif"))]
+    manifest = {
+        "version": CELL_MANIFEST_VERSION,
+        "poster": poster_key,
+        "image": lossless[0] if lossless else None,
+        "files": paths,
+        "cells": keys,
+    }
+    path = cell_manifest_path(base_filename)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def dirty_bands(cells, changed):
+    """Merged (top, bottom) row ranges covering the cells at the changed indexes."""
+    bands = []
+    for top, bottom in sorted(
+        (cells[index]["y"], cells[index]["y"] + cells[index]["height"]) for index in changed
+    ):
+        if bands and top <= bands[-1][1]:
+            bands[-1][1] = max(bands[-1][1], bottom)
+        else:
+            bands.append([top, bottom])
+    return [tuple(band) for band in bands]
+
+
+def render_strips(
+    size,
+    strip_height,
+    cells,
+    langs,
+    names,
+    font,
+    colors,
+    border_width,
+    base_filename,
+    cache=None,
+    workers=None,
+    formats=("png", "tif"),
+    png_level=None,
+    scale=1,
+):
+    """
+    Render the poster as bands of strip_height rows and stream each band to
+    a PNG and/or a TIFF (formats) per language. Only the band and the tiles
+    of the cells it crosses are held in memory. colors is (background,
+    border, text). scale is as for draw_border. Returns {lang: output paths}.
+    """
+    width, height = size
+    text_color = colors[2]
+    writers = {}
+    for lang in langs:
+        suffix = f"_{lang}" if len(langs) > 1 else ""
+        writers[lang] = []
+        if "png" in formats:
+            writers[lang].append(
+                PNGStripWriter(
+                    f"{base_filename}{suffix}.png",
+                    width,
+                    height,
+                    9 if png_level is None else png_level,
+                )
+            )
+        if "tif" in formats:
+            writers[lang].append(
+                TIFFStripWriter(f"{base_filename}{suffix}.tif", width, height, strip_height)
+            )
+    encode_seconds = {}
+
+    strip_count = math.ceil(height / strip_height)
+    tiles = {}
+    pool = cell_pool(cache, workers)
+    try:
+        for strip, top in enumerate(range(0, height, strip_height), 1):
+            bottom = min(top + strip_height, height)
+            crossing = cells_crossing(cells, top, bottom)
+            new = [index for index in crossing if index not in tiles]
+            rendered = render_cells([cells[index] for index in new], cache, workers, pool)
+            tiles.update(zip(new, rendered))
+
+            band = render_band(size, top, bottom, cells, tiles, border_width, colors, cache, scale)
+            band_cells = [cells[index] for index in crossing]
+            band_tiles = [tiles[index] for index in crossing]
+            for lang in langs:
+                layer = band.copy() if len(langs) > 1 else band
+                draw_captions(layer, band_cells, band_tiles, names[lang], font, text_color, top)
+                for writer in writers[lang]:
+                    started = time.perf_counter()
+                    writer.write(layer)
+                    encode_seconds[writer.path] = (
+                        encode_seconds.get(writer.path, 0) + time.perf_counter() - started
                     )
 
-                except Exception as e:
-                    print(f"Error loading Pokemon #{ pokemon_id}: {e}")
-
-            pokemon_id += 1
+            # Cells that end in this band are not needed again
+            for index in crossing:
+                if cells[index]["y"] + cells[index]["height"] <= bottom:
+                    del tiles[index]
+            print(f"Completed strip {strip}/{strip_count} (rows {top}-{bottom - 1})")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    outputs = {}
+    for lang in langs:
+        outputs[lang] = []
+        for writer in writers[lang]:
+            writer.close()
+            outputs[lang].append(writer.path)
+            fmt = os.path.splitext(writer.path)[1][1:]
+            print(
+                f"✅ {FORMAT_NAMES[fmt]} saved: {writer.path} "
+                f"({format_size(writer.path)}, {encode_seconds.get(writer.path, 0):.1f}s encoding)"
+            )
+    return outputs
+
+
+def create_pokemon_posters(
+    langs,
+    cache=None,
+    workers=None,
+    ids=None,
+    paper="A1",
+    logo=True,
+    output=None,
+    strip_height=None,
+    formats=FORMATS,
+    png_level=None,
+    scale=1,
+    full=False,
+):
+    """
+    Create the poster once per language in langs.
+    Without ids this is the classic 151 layout; otherwise ids are packed
+    into the best grid for the paper size (see poster_layout).
+    Border, sprites and logo are language independent, so they are rendered
+    once into a base layer; each language only draws its captions onto a
+    copy of it, and the languages are finished and saved concurrently.
+    Logo and sprite thumbnails come from cache (an AssetCache) when given.
+    Cells are rendered on `workers` processes (default: one per core).
+    With strip_height, the poster is rendered and streamed to PNG and TIFF
+    in bands of that many rows instead of in one piece (no JPEG).
+    formats selects among FORMATS; png_level trades PNG size for speed.
+    scale renders the same layout at a fraction of the resolution, e.g. 0.1
+    for a quick 30 DPI preview.
+    Each output keeps a manifest of its cells' inputs; unless full is set,
+    a later run loads the previous poster and redraws only the rows whose
+    cells changed. Returns {lang: output paths}.
+    """
+    WIDTH_CM, HEIGHT_CM = PAPER_SIZES[paper]
+    POSTER_WIDTH, POSTER_HEIGHT = paper_pixels(paper)
 
-        print(f"Completed row {row}, up to Pokemon #{ pokemon_id-1}")
+    # Layout configuration
+    BORDER_WIDTH = 150
 
-    # Save the poster in multiple formats
-    base_filename = "pokemon_poster_A1"
-    output_paths = []
+    # Colors - Pokemon theme
+    BACKGROUND_COLOR = (252, 250, 245)
+    BORDER_COLOR = (60, 90, 150)
+    TEXT_COLOR = (50, 50, 50)  # Dark gray
 
-    print("\nSaving poster in multiple formats...")
+    if ids is None:
+        layout = preset_layout(CLASSIC_151, POSTER_WIDTH, POSTER_HEIGHT, BORDER_WIDTH)
+    else:
+        layout = grid_layout(ids, POSTER_WIDTH, POSTER_HEIGHT, logo, BORDER_WIDTH)
+    if scale != 1:
+        # Same geometry, scaled down from the full-size layout
+        layout = scale_layout(layout, scale)
+        POSTER_WIDTH, POSTER_HEIGHT = layout["width"], layout["height"]
+    poster_dpi = DPI * scale
+    print(
+        f"Creating poster: {POSTER_WIDTH}x{POSTER_HEIGHT} pixels ({WIDTH_CM}x{HEIGHT_CM}cm at {poster_dpi:g} DPI)"
+    )
+    cells = layout["cells"]
+    pokemon_ids = [cell["id"] for cell in cells if cell["id"] is not None]
+    sizes = sorted({cell["size"] for cell in cells if cell["id"] is not None}, reverse=True)
+    print(
+        f"Layout {layout['name']}: {len(pokemon_ids)} Pokemon in {layout['rows']} rows, "
+        f"sprites {'/'.join(str(size) for size in sizes)}px, captions {layout['font_size']}px"
+    )
 
-    # Save as PNG (with transparency support)
-    png_path = f"{base_filename}.png"
-    poster.save(png_path, "PNG", optimize=True)
-    output_paths.append(png_path)
-    print(f"✅ PNG saved: {png_path}")
+    # List missing sprites up front from one directory listing
+    available = scan_sprites("pokemon")
+    missing = [pokemon_id for pokemon_id in pokemon_ids if pokemon_id not in available]
+    for cell in cells:
+        cell["missing"] = cell["id"] is not None and cell["id"] not in available
+    if missing:
+        print(f"⚠️  No sprite for {len(missing)} Pokemon: {format_ids(missing)}")
 
-    # Save as TIFF (high quality, lossless)
-    tif_path = f"{base_filename}.tif"
-    poster.save(tif_path, "TIFF", compression="lzw")
-    output_paths.append(tif_path)
-    print(f"✅ TIFF saved: {tif_path}")
+    # Load fonts - with Chinese support
+    font_path = find_font_path()
+    title_font, name_font = load_fonts(font_path, layout["font_size"])
+    names = load_pokemon_names(pokemon_ids, langs)
+    base_filename = output or f"pokemon_poster_{paper}"
+    targets = {
+        lang: base_filename + (f"_{lang}" if len(langs) > 1 else "") for lang in langs
+    }
+    colors = (BACKGROUND_COLOR, BORDER_COLOR, TEXT_COLOR)
+
+    # Inputs shared by all cells (a change redraws everything), then per cell
+    poster_key = _digest(
+        {
+            "size": [POSTER_WIDTH, POSTER_HEIGHT],
+            "colors": colors,
+            "border": BORDER_WIDTH,
+            "scale": scale,
+            "font": [font_path, layout["font_size"]],
+            "cells": len(cells),
+        }
+    )
+    sprite_hashes = {
+        pokemon_id: file_sha256(f"pokemon/{pokemon_id}.png")
+        for pokemon_id in pokemon_ids
+        if pokemon_id in available
+    }
+    logo_hash = file_sha256("assets/logo.png") if os.path.exists("assets/logo.png") else None
+    keys = {lang: cell_keys(cells, names[lang], sprite_hashes, logo_hash) for lang in langs}
+
+    process_count = (os.cpu_count() or 1) if workers is None else max(1, workers)
+    if strip_height:
+        print(
+            f"Rendering {len(cells)} cells with {process_count} processes "
+            f"in strips of {strip_height} rows..."
+        )
+        outputs = render_strips(
+            (POSTER_WIDTH, POSTER_HEIGHT),
+            strip_height,
+            cells,
+            langs,
+            names,
+            name_font,
+            colors,
+            BORDER_WIDTH,
+            base_filename,
+            cache,
+            workers,
+            formats,
+            png_level,
+            scale,
+        )
+        for lang in langs:
+            save_cell_manifest(targets[lang], poster_key, keys[lang], outputs[lang])
+        if "jpg" in formats:
+            print("ℹ️  No JPEG in strip mode, it cannot be encoded piecewise")
+        formats = [fmt for fmt in formats if fmt != "jpg"]
+    else:
+        # Outputs whose previous render can be patched, and the row bands
+        # holding the cells whose inputs changed since
+        previous = {}
+        bands = {}
+        for lang in [] if full else langs:
+            manifest = load_cell_manifest(targets[lang], poster_key, (POSTER_WIDTH, POSTER_HEIGHT))
+            if manifest is None or len(manifest["cells"]) != len(cells):
+                continue
+            changed = [
+                index
+                for index, key in enumerate(keys[lang])
+                if key != manifest["cells"][index]
+            ]
+            previous[lang] = manifest
+            bands[lang] = dirty_bands(cells, changed)
+            print(
+                f"♻️  {targets[lang]}: {len(changed)} changed cells "
+                f"in {len(bands[lang])} row bands"
+            )
+        full_langs = [lang for lang in langs if lang not in previous]
+
+        # Decode and resample every cell needed (in parallel)
+        if full_langs:
+            needed = list(range(len(cells)))
+        else:
+            needed = sorted(
+                {
+                    index
+                    for lang in bands
+                    for top, bottom in bands[lang]
+                    for index in cells_crossing(cells, top, bottom)
+                }
+            )
+        count = f"{len(needed)} of {len(cells)}" if len(needed) < len(cells) else len(cells)
+        print(f"Rendering {count} cells with {process_count} processes...")
+        rendered = render_cells([cells[index] for index in needed], cache, workers) if needed else []
+        tiles = dict(zip(needed, rendered))
+
+        if full_langs:
+            # Create poster image
+            poster = Image.new("RGB", (POSTER_WIDTH, POSTER_HEIGHT), BACKGROUND_COLOR)
+            # Draw decorative border
+            draw_border(poster, poster.size, BORDER_WIDTH, BORDER_COLOR, scale=scale)
+
+            # Composite the tiles in layout order so the result matches a
+            # serial render
+            current_row = 1
+            last_id = None
+            for index, cell in enumerate(cells):
+                if cell["row"] != current_row:
+                    print(f"Completed row {current_row}, up to Pokemon #{last_id}")
+                    current_row = cell["row"]
+                paste_tile(poster, cell, tiles[index], cache)
+                if cell["id"] is not None:
+                    last_id = cell["id"]
+            print(f"Completed row {current_row}, up to Pokemon #{last_id}")
+
+        def update(lang):
+            # Redraw the changed row bands of the previous poster
+            manifest = previous[lang]
+            wanted = [f"{targets[lang]}.{fmt}" for fmt in formats]
+            if not bands[lang] and all(
+                path in manifest["files"] and os.path.exists(path) for path in wanted
+            ):
+                print(f"✅ {targets[lang]}: no cells changed, keeping {', '.join(wanted)}")
+                return wanted
+            with Image.open(manifest["image"]) as previous_image:
+                layer = previous_image.convert("RGB")
+            for top, bottom in bands[lang]:
+                band = render_band(
+                    layer.size, top, bottom, cells, tiles, BORDER_WIDTH, colors, cache, scale
+                )
+                crossing = cells_crossing(cells, top, bottom)
+                draw_captions(
+                    band,
+                    [cells[index] for index in crossing],
+                    [tiles[index] for index in crossing],
+                    names[lang],
+                    name_font,
+                    TEXT_COLOR,
+                    top,
+                )
+                layer.paste(band, (0, top))
+            paths = save_poster(layer, targets[lang], BACKGROUND_COLOR, formats, png_level)
+            save_cell_manifest(targets[lang], poster_key, keys[lang], paths)
+            return paths
+
+        # Save the poster in multiple formats
+        def finish(lang):
+            if lang in previous:
+                return update(lang)
+            # A single language can draw straight onto the base layer
+            layer = poster.copy() if len(full_langs) > 1 else poster
+            draw_captions(
+                layer,
+                cells,
+                [tiles[index] for index in range(len(cells))],
+                names[lang],
+                name_font,
+                TEXT_COLOR,
+            )
+            paths = save_poster(layer, targets[lang], BACKGROUND_COLOR, formats, png_level)
+            save_cell_manifest(targets[lang], poster_key, keys[lang], paths)
+            return paths
+
+        print(f"\nSaving poster in multiple formats ({', '.join(langs)})...")
+        # Encoders release the GIL, so threads overlap without copying the
+        # poster into other processes
+        with ThreadPoolExecutor(max_workers=min(len(langs), os.cpu_count() or 1)) as pool:
+            outputs = dict(zip(langs, pool.map(finish, langs)))
+
+    output_paths = [path for lang in langs for path in outputs[lang]]
+    plural = "s" if len(formats) > 1 else ""
+    print(f"\n✅ Poster created successfully in {len(formats)} format{plural}!")
+    print(f"📁 Files: {', '.join(output_paths)}")
+    print(f"📏 Size: {POSTER_WIDTH}x{POSTER_HEIGHT} pixels")
+    print(f"📐 Physical: {WIDTH_CM}x{HEIGHT_CM} cm at {poster_dpi:g} DPI")
+    print(f"🔢 Pokemon included: {len(pokemon_ids) - len(missing)}")
+    if cache is not None:
+        cache.evict()
+        print(f"🗂️  Asset cache: {cache.hits} reused, {cache.misses} rendered")
 
-    # Save as JPEG (smaller file size, but convert to RGB first)
-    jpg_path = f"{base_filename}.jpg"
-    # Convert to RGB for JPEG (removes transparency)
-    poster_rgb = Image.new("RGB", poster.size, BACKGROUND_COLOR)
-    poster_rgb.paste(poster, mask=poster.split()[-1] if poster.mode == "RGBA" else None)
-    poster_rgb.save(jpg_path, "JPEG", quality=95, optimize=True)
-    output_paths.append(jpg_path)
-    print(f"✅ JPEG saved: {jpg_path}")
+    return outputs
 
-    print("\n✅ Poster created successfully in 3 formats!")
-    print(f"📁 Files: {', '.join(output_paths)}")
-    print(f"📏 Size: {poster.size[0]}x{poster.size[1]} pixels")
-    print(f"📐 Physical: {WIDTH_CM}x{HEIGHT_CM} cm at {DPI} DPI")
-    print(f"🔢 Pokemon included: {min(pokemon_id-1, 151)}")
 
-    return output_paths
+def create_pokemon_poster(lang="en", cache=None, workers=None, **options):
+    """
+    Create the poster in one language; returns its output paths.
+    Kept for callers of the single-language API, see create_pokemon_posters
+    for the options.
+    """
+    return create_pokemon_posters([lang], cache=cache, workers=workers, **options)[lang]
 
 
 def main():
@@ -362,16 +859,158 @@ def main():
     parser = argparse.ArgumentParser(
         description="Create a Pokemon poster with all 151 original Pokemon"
     )
+    parser.add_argument(
+        "--ids",
+        help="Pokemon IDs to include instead of the classic 151, e.g. 1-1025 or 1-151,250. "
+        "They are packed into the grid that gives the largest sprites",
+    )
+    parser.add_argument(
+        "--generation",
+        type=int,
+        choices=sorted(GENERATIONS),
+        help="Include one generation, e.g. 2 for #152-251",
+    )
+    parser.add_argument(
+        "--paper",
+        choices=sorted(PAPER_SIZES),
+        default="A1",
+        help="Paper size (default: A1)",
+    )
+    parser.add_argument(
+        "--no-logo",
+        action="store_true",
+        help="Leave the Pokeball logo out of a packed grid",
+    )
+    parser.add_argument(
+        "--output",
+        help="Output filename without extension (default: pokemon_poster_<paper>)",
+    )
+    parser.add_argument(
+        "--strip-height",
+        type=int,
+        default=None,
+        help="Render and stream the poster in bands of this many pixel rows, so memory "
+        "does not grow with the poster size (PNG and TIFF only, no JPEG)",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Render the same layout at --preview-dpi into a single fast PNG "
+        "(<output>_preview.png) to check layout and font changes",
+    )
+    parser.add_argument(
+        "--preview-dpi",
+        type=int,
+        default=30,
+        help="Resolution of --preview (default: 30)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Redraw every cell instead of only those whose sprite, name or "
+        "geometry changed since the last render",
+    )
+    parser.add_argument(
+        "--formats",
+        default=",".join(FORMATS),
+        help="Comma-separated output formats out of png, tif and jpg (default: all three)",
+    )
+    parser.add_argument(
+        "--png-level",
+        type=int,
+        choices=range(0, 10),
+        metavar="0-9",
+        default=None,
+        help="PNG compression level; lower is faster but larger, for drafts "
+        "(default: smallest file)",
+    )
     parser.add_argument(
         "--lang", "-l",
         default="en",
-        help="Language for Pokemon names (default: en). Use language codes like 'en', 'ja', 'zh', etc."
+        help="Language for Pokemon names (default: en). Use language codes like 'en', 'ja', 'zh', etc. "
+        "A comma-separated list (e.g. en,ja,zh,ko) renders one poster per language, "
+        "saved with the language as a filename suffix",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes used to render cells (default: CPU count, 1: render serially)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory for cached logo and sprite thumbnails (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+        help="Evict least recently used cached assets above this size (default: 256)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Decode and resample every asset from its source",
     )
 
     args = parser.parse_args()
 
-    print(f"Creating poster with Pokemon names in language: {args.lang}")
-    create_pokemon_poster(lang=args.lang)
+    if args.strip_height is not None and args.strip_height < 1:
+        parser.error("--strip-height must be at least 1")
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown or not formats:
+        parser.error(f"--formats takes png, tif and jpg, got: {args.formats}")
+    formats = list(dict.fromkeys(formats))
+    if args.strip_height and formats == ["jpg"]:
+        parser.error("strip mode cannot write JPEG, add png or tif to --formats")
+    if args.preview and not 0 < args.preview_dpi <= DPI:
+        parser.error(f"--preview-dpi must be between 1 and {DPI}")
+    ids = None
+    if args.ids and args.generation:
+        parser.error("use either --ids or --generation")
+    if args.ids:
+        try:
+            ids = parse_ids(args.ids)
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.generation:
+        first, last = GENERATIONS[args.generation]
+        ids = list(range(first, last + 1))
+
+    cache = None
+    if not args.no_cache:
+        cache = AssetCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+
+    langs = [lang.strip() for lang in args.lang.split(",") if lang.strip()]
+    print(f"Creating poster with Pokemon names in language: {', '.join(langs)}")
+    output = args.output
+    scale = 1
+    png_level = args.png_level
+    if args.preview:
+        output = (output or f"pokemon_poster_{args.paper}") + "_preview"
+        scale = args.preview_dpi / DPI
+        formats = ["png"]
+        if png_level is None:
+            png_level = 1
+    try:
+        create_pokemon_posters(
+            langs,
+            cache=cache,
+            workers=args.workers,
+            ids=ids,
+            paper=args.paper,
+            logo=not args.no_logo,
+            output=output,
+            strip_height=args.strip_height,
+            formats=formats,
+            png_level=png_level,
+            scale=scale,
+            full=args.full,
+        )
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
 
 
 if __name__ == "__main__":
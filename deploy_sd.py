@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Delta sync of the fetcher output to the receiver's MicroSD card
+Copies `pokemon/` into `<target>/pokemon/` (any mounted card or local
+directory), writing only files that are new or changed and deleting ones
+that are no longer in the source.
+
+What is on the card is tracked in `<target>/pokemon/.deploy_manifest.json`
+(name -> SHA-256, size and the source file's mtime), so unchanged files are
+recognised without reading the card, and source files are only hashed again
+when their size or mtime changed. Files are copied in name order through a
+large buffer to a temp name and renamed into place, so a pulled card holds
+either the old or the new version of each file; the manifest is saved after
+the data has been synced to the card.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+
+MANIFEST = ".deploy_manifest.json"
+# Files the receiver uses: {id}.json, {id}.gif, {id}.png and RGB565 streams {id}.565
+DEPLOY_EXTS = (".json", ".gif", ".png", ".565")
+# ...and the packed catalog written by pack_catalog.py
+CATALOG = "pokedex.bin"
+DEFAULT_BUFFER = 1024 * 1024
+# Files copied between manifest checkpoints, so an interrupted deploy keeps its progress
+CHECKPOINT_FILES = 200
+
+
+def is_deployable(name, skip_png=False):
+    if name == CATALOG:
+        return True
+    stem, ext = os.path.splitext(name)
+    if not stem.isdigit() or ext not in DEPLOY_EXTS:
+        return False
+    return not (skip_png and ext == ".png")
+
+
+def file_sha256(path, buffer_size=DEFAULT_BUFFER):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(buffer_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(target_dir):
+    path = os.path.join(target_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("files", {})
+
+
+def save_manifest(target_dir, files):
+    path = os.path.join(target_dir, MANIFEST)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"files": files}, f, separators=(",", ":"), sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def scan_source(source_dir, manifest, skip_png=False):
+    """
+    Describe every deployable file in source_dir as name -> {sha256, size, src_mtime_ns}.
+    Hashes are reused from manifest when the size and mtime are unchanged.
+    """
+    files = {}
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not is_deployable(entry.name, skip_png):
+                continue
+            stat = entry.stat()
+            known = manifest.get(entry.name)
+            if (
+                known
+                and known.get("size") == stat.st_size
+                and known.get("src_mtime_ns") == stat.st_mtime_ns
+            ):
+                digest = known["sha256"]
+            else:
+                digest = file_sha256(entry.path)
+            files[entry.name] = {
+                "sha256": digest,
+                "size": stat.st_size,
+                "src_mtime_ns": stat.st_mtime_ns,
+            }
+    return files
+
+
+def plan_sync(source_files, manifest, target_dir):
+    """
+    Return (names to copy, names to delete). A file is copied when the
+    manifest has a different hash for it or it is missing on the target;
+    deployable files on the target that are not in the source are deleted.
+    """
+    on_target = set()
+    if os.path.isdir(target_dir):
+        with os.scandir(target_dir) as entries:
+            on_target = {
+                e.name for e in entries if e.is_file() and is_deployable(e.name)
+            }
+    to_copy = sorted(
+        name
+        for name, info in source_files.items()
+        if name not in on_target
+        or manifest.get(name, {}).get("sha256") != info["sha256"]
+    )
+    to_delete = sorted(on_target - set(source_files))
+    return to_copy, to_delete
+
+
+def copy_file(src_path, dst_path, buffer_size=DEFAULT_BUFFER):
+    """Copy through a temp file next to dst_path in buffer_size writes, then rename."""
+    tmp_path = dst_path + ".tmp"
+    try:
+        with open(src_path, "rb") as src, open(tmp_path, "wb", buffering=0) as dst:
+            shutil.copyfileobj(src, dst, length=buffer_size)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _sync_to_disk():
+    # Make sure the data is on the card before the manifest claims it is
+    if hasattr(os, "sync"):
+        os.sync()
+
+
+def deploy(
+    source_dir,
+    target,
+    skip_png=False,
+    dry_run=False,
+    buffer_size=DEFAULT_BUFFER,
+    progress=print,
+):
+    """
+    Sync source_dir into <target>/pokemon. Returns a report dict with the
+    files copied and deleted, bytes written and time taken.
+    """
+    started = time.perf_counter()
+    target_dir = os.path.join(target, "pokemon")
+    manifest = load_manifest(target_dir)
+    source_files = scan_source(source_dir, manifest, skip_png)
+    to_copy, to_delete = plan_sync(source_files, manifest, target_dir)
+    copy_bytes = sum(source_files[name]["size"] for name in to_copy)
+    report = {
+        "target": target_dir,
+        "files": len(source_files),
+        "copied": len(to_copy),
+        "deleted": len(to_delete),
+        "unchanged": len(source_files) - len(to_copy),
+        "bytes": copy_bytes,
+        "dry_run": dry_run,
+    }
+    if dry_run:
+        for name in to_copy:
+            progress(f"copy {name} ({source_files[name]['size'] / 1024:.1f}KB)")
+        for name in to_delete:
+            progress(f"delete {name}")
+        report["seconds"] = time.perf_counter() - started
+        return report
+
+    os.makedirs(target_dir, exist_ok=True)
+    # Unchanged files keep their entry, with the current source mtime
+    pending = set(to_copy)
+    files = {
+        name: source_files[name]
+        for name in manifest
+        if name in source_files and name not in pending
+    }
+
+    for name in to_delete:
+        os.remove(os.path.join(target_dir, name))
+    copy_started = time.perf_counter()
+    for i, name in enumerate(to_copy, 1):
+        copy_file(
+            os.path.join(source_dir, name), os.path.join(target_dir, name), buffer_size
+        )
+        files[name] = source_files[name]
+        if i % CHECKPOINT_FILES == 0:
+            _sync_to_disk()
+            save_manifest(target_dir, files)
+            progress(f"Copied {i}/{len(to_copy)} files")
+    _sync_to_disk()
+    save_manifest(target_dir, files)
+    copy_seconds = time.perf_counter() - copy_started
+    report["seconds"] = time.perf_counter() - started
+    report["write_bytes_per_s"] = copy_bytes / copy_seconds if copy_seconds > 0 else None
+    return report
+
+
+def verify(target):
+    """
+    Check <target>/pokemon against its manifest by reading every file back.
+    Files that fail are dropped from the manifest, so the next deploy
+    rewrites them. Returns a list of human-readable problems (empty when the
+    card is good).
+    """
+    target_dir = os.path.join(target, "pokemon")
+    manifest = load_manifest(target_dir)
+    if not manifest:
+        return [f"{target_dir}: no deploy manifest"]
+    problems = []
+    bad = []
+    tracked = set(manifest)
+    for name, info in sorted(manifest.items()):
+        path = os.path.join(target_dir, name)
+        if not os.path.exists(path):
+            problems.append(f"{name}: missing")
+        elif os.path.getsize(path) != info["size"]:
+            problems.append(f"{name}: size {os.path.getsize(path)}, expected {info['size']}")
+        elif file_sha256(path) != info["sha256"]:
+            problems.append(f"{name}: content differs from manifest")
+        else:
+            continue
+        bad.append(name)
+    if bad:
+        for name in bad:
+            del manifest[name]
+        save_manifest(target_dir, manifest)
+    with os.scandir(target_dir) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if is_deployable(entry.name) and entry.name not in tracked:
+                problems.append(f"{entry.name}: not in manifest")
+    return problems
+
+
+def format_report(report):
+    if report["dry_run"]:
+        return (
+            f"Would copy {report['copied']} files ({report['bytes'] / 1024 / 1024:.1f}MB) "
+            f"and delete {report['deleted']} in {report['target']}, "
+            f"{report['unchanged']} unchanged"
+        )
+    line = (
+        f"✅ {report['target']}: copied {report['copied']} files "
+        f"({report['bytes'] / 1024 / 1024:.1f}MB), deleted {report['deleted']}, "
+        f"{report['unchanged']} unchanged in {report['seconds']:.1f}s"
+    )
+    if report.get("write_bytes_per_s"):
+        line += f", {report['write_bytes_per_s'] / 1024 / 1024:.1f}MB/s"
+    return line
+
+
+def self_test():
+    """
+    Deploy a synthetic source directory into a temp target and check what
+    lands on it, including the catalog and with --skip-png. Returns a list
+    of human-readable problems (empty when everything behaved).
+    """
+    problems = []
+    with tempfile.TemporaryDirectory() as root:
+        source = os.path.join(root, "source")
+        target = os.path.join(root, "card")
+        os.makedirs(source)
+        contents = {
+            "1.json": b'{"id": 1}',
+            "1.gif": b"GIF89a" + bytes(200),
+            "1.png": b"\x89PNG" + bytes(100),
+            "1.565": bytes(64),
+            CATALOG: b"PKDX" + bytes(60),
+            # Not for the receiver
+            "pokedex.db": b"SQLite",
+            ".sync_journal.jsonl": b"{}",
+            "notes.txt": b"x",
+        }
+        for name, data in contents.items():
+            with open(os.path.join(source, name), "wb") as f:
+                f.write(data)
+        target_dir = os.path.join(target, "pokemon")
+
+        def check(step, expected):
+            on_card = sorted(n for n in os.listdir(target_dir) if n != MANIFEST)
+            if on_card != sorted(expected):
+                problems.append(f"{step}: card has {on_card}, expected {sorted(expected)}")
+            for name in set(on_card) & set(expected):
+                with open(os.path.join(target_dir, name), "rb") as f:
+                    if f.read() != contents[name]:
+                        problems.append(f"{step}: {name} differs from the source")
+            problems.extend(f"{step}: {p}" for p in verify(target))
+
+        report = deploy(source, target, progress=lambda line: None)
+        check("first deploy", ["1.json", "1.gif", "1.png", "1.565", CATALOG])
+        if report["copied"] != 5:
+            problems.append(f"first deploy: copied {report['copied']} files, expected 5")
+
+        contents[CATALOG] = b"PKDX" + bytes(range(60))
+        with open(os.path.join(source, CATALOG), "wb") as f:
+            f.write(contents[CATALOG])
+        report = deploy(source, target, skip_png=True, progress=lambda line: None)
+        check("--skip-png deploy", ["1.json", "1.gif", "1.565", CATALOG])
+        if (report["copied"], report["deleted"]) != (1, 1):
+            problems.append(
+                f"--skip-png deploy: copied {report['copied']} and deleted "
+                f"{report['deleted']} files, expected 1 and 1"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Copy new and changed Pokemon files to the receiver's SD card"
+    )
+    parser.add_argument(
+        "target", nargs="?", help="Mount point of the SD card (or any directory)"
+    )
+    parser.add_argument(
+        "--source",
+        default="pokemon",
+        help="Directory with the fetcher output (default: pokemon)",
+    )
+    parser.add_argument(
+        "--skip-png",
+        action="store_true",
+        help="Leave out the PNGs, which the receiver does not read",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only list what would be copied and deleted",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Read every file on the card back and check it against the manifest",
+    )
+    parser.add_argument(
+        "--buffer-kb",
+        type=int,
+        default=DEFAULT_BUFFER // 1024,
+        help="Write size in KB (default: 1024)",
+    )
+    parser.add_argument(
+        "--self-test",
+        action="store_true",
+        help="Deploy synthetic files to a temp directory and check the result",
+    )
+    args = parser.parse_args()
+
+    if args.self_test:
+        problems = self_test()
+        for problem in problems:
+            print(problem)
+        if problems:
+            raise SystemExit(f"❌ {len(problems)} problems in the synthetic deploy")
+        print("✅ Synthetic deploy copied, updated and removed the right files")
+        return
+    if args.target is None:
+        parser.error("the target directory is required")
+
+    if args.verify:
+        problems = verify(args.target)
+        for problem in problems:
+            print(problem)
+        if problems:
+            raise SystemExit(
+                f"❌ {len(problems)} problems on {args.target}, deploy again to rewrite them"
+            )
+        print(f"✅ {args.target} matches its deploy manifest")
+        return
+
+    report = deploy(
+        args.source,
+        args.target,
+        skip_png=args.skip_png,
+        dry_run=args.dry_run,
+        buffer_size=args.buffer_kb * 1024,
+    )
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+RGB565 frame stream export
+Converts the fetched GIFs into pre-decoded frame streams that the receiver
+can copy from SD straight to the display, without holding the GIF in heap
+or decoding LZW on the ESP32.
+
+Each frame is composited onto the background, scaled into the display box,
+ordered-dithered to RGB565 and stored as the rectangle that changed since
+the previous frame, run-length encoded.
+
+Stream layout (header fields little-endian, pixels big-endian as the panel
+expects them on the wire):
+
+Header, 16 bytes:
+    magic "P565", version (u16), width (u16), height (u16),
+    frame count (u16), loop count (u16, 0 = forever), reserved (u16)
+
+Frame, repeated frame count times:
+    delay in ms (u16), x (u16), y (u16), w (u16), h (u16), payload bytes (u32)
+    payload: runs covering the w*h rectangle row by row. Each run starts with
+    a u16 (little-endian) count; if bit 15 is set, the next pixel is repeated
+    (count & 0x7FFF) times, otherwise count literal pixels follow.
+    A frame with w = h = 0 only waits for its delay.
+"""
+
+import os
+import io
+import time
+import struct
+import argparse
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+MAGIC = b"P565"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHHHH")
+FRAME = struct.Struct("<HHHHHI")
+RUN = struct.Struct("<H")
+
+REPEAT_FLAG = 0x8000
+MAX_RUN = 0x7FFF
+# Shorter repeats are cheaper to store as part of a literal run
+MIN_REPEAT = 3
+
+# Size of the GIF area on the receiver (GIF_AREA_SIZE in pokedex_receiver.ino)
+DEFAULT_BOX = (144, 144)
+
+# 4x4 Bayer matrix, normalised to [0, 1)
+BAYER_4X4 = (
+    np.array(
+        [[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]],
+        dtype=np.float32,
+    )
+    / 16.0
+)
+
+
+def parse_color(value):
+    """Parse 'RRGGBB' into an (r, g, b) tuple."""
+    value = value.lstrip("#")
+    return tuple(int(value[i : i + 2], 16) for i in (0, 2, 4))
+
+
+def load_frames(gif_path, box=DEFAULT_BOX, background=(0, 0, 0), resample=Image.Resampling.NEAREST):
+    """
+    Decode a GIF into composited RGB frames scaled to fit box and centered
+    on a background-colored canvas of that size.
+    Returns (frames as HxWx3 uint8 arrays, delays in ms, loop count).
+    """
+    frames = []
+    delays = []
+    with Image.open(gif_path) as im:
+        loop = im.info.get("loop", 0)
+        scale = min(box[0] / im.width, box[1] / im.height)
+        size = (max(1, round(im.width * scale)), max(1, round(im.height * scale)))
+        offset = ((box[0] - size[0]) // 2, (box[1] - size[1]) // 2)
+        for frame in ImageSequence.Iterator(im):
+            delays.append(frame.info.get("duration", im.info.get("duration", 100)))
+            rgba = frame.convert("RGBA").resize(size, resample)
+            canvas = Image.new("RGB", box, background)
+            canvas.paste(rgba, offset, rgba)
+            frames.append(np.asarray(canvas))
+    return frames, delays, loop
+
+
+def dither_rgb565(rgb):
+    """Ordered-dither an HxWx3 uint8 array to an HxW uint16 RGB565 array."""
+    h, w, _ = rgb.shape
+    threshold = np.tile(BAYER_4X4, (h // 4 + 1, w // 4 + 1))[:h, :w]
+    values = rgb.astype(np.float32)
+    # 5 bits keep steps of 8 for red/blue, 6 bits steps of 4 for green
+    r = np.clip((values[..., 0] + threshold * 8) // 8, 0, 31).astype(np.uint16)
+    g = np.clip((values[..., 1] + threshold * 4) // 4, 0, 63).astype(np.uint16)
+    b = np.clip((values[..., 2] + threshold * 8) // 8, 0, 31).astype(np.uint16)
+    return (r << 11) | (g << 5) | b
+
+
+def changed_rect(previous, current):
+    """Bounding box (x, y, w, h) of pixels that differ, or None if identical."""
+    if previous is None:
+        return 0, 0, current.shape[1], current.shape[0]
+    diff = previous != current
+    rows = np.flatnonzero(diff.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(diff.any(axis=0))
+    return (
+        int(cols[0]),
+        int(rows[0]),
+        int(cols[-1] - cols[0] + 1),
+        int(rows[-1] - rows[0] + 1),
+    )
+
+
+def rle_encode(pixels):
+    """Run-length encode a flat uint16 array into the stream's run format."""
+    n = pixels.size
+    if n == 0:
+        return b""
+    starts = np.concatenate(([0], np.flatnonzero(pixels[1:] != pixels[:-1]) + 1))
+    lengths = np.diff(np.concatenate((starts, [n])))
+    big_endian = pixels.astype(">u2")
+
+    out = io.BytesIO()
+    literal_start = None
+
+    def flush_literals(end):
+        start = literal_start
+        while start < end:
+            count = min(MAX_RUN, end - start)
+            out.write(RUN.pack(count))
+            out.write(big_endian[start : start + count].tobytes())
+            start += count
+
+    for start, length in zip(starts.tolist(), lengths.tolist()):
+        if length < MIN_REPEAT:
+            if literal_start is None:
+                literal_start = start
+            continue
+        if literal_start is not None:
+            flush_literals(start)
+            literal_start = None
+        pixel = big_endian[start : start + 1].tobytes()
+        while length > 0:
+            count = min(MAX_RUN, length)
+            out.write(RUN.pack(REPEAT_FLAG | count))
+            out.write(pixel)
+            length -= count
+    if literal_start is not None:
+        flush_literals(n)
+    return out.getvalue()
+
+
+def rle_decode(payload, count):
+    """Inverse of rle_encode: return `count` pixels as a uint16 array."""
+    pixels = np.empty(count, dtype=np.uint16)
+    pos = 0
+    filled = 0
+    while filled < count:
+        (header,) = RUN.unpack_from(payload, pos)
+        pos += RUN.size
+        if header & REPEAT_FLAG:
+            length = header & MAX_RUN
+            (pixel,) = struct.unpack_from(">H", payload, pos)
+            pos += 2
+            pixels[filled : filled + length] = pixel
+        else:
+            length = header
+            pixels[filled : filled + length] = np.frombuffer(
+                payload, dtype=">u2", count=length, offset=pos
+            )
+            pos += 2 * length
+        filled += length
+    return pixels
+
+
+def encode_frames(frames565, delays, loop=0):
+    """Encode RGB565 frames (HxW uint16 arrays) into a frame stream."""
+    height, width = frames565[0].shape
+    out = io.BytesIO()
+    out.write(HEADER.pack(MAGIC, VERSION, width, height, len(frames565), loop, 0))
+    previous = None
+    for frame, delay in zip(frames565, delays):
+        rect = changed_rect(previous, frame)
+        if rect is None:
+            out.write(FRAME.pack(min(int(delay), 0xFFFF), 0, 0, 0, 0, 0))
+            continue
+        x, y, w, h = rect
+        payload = rle_encode(frame[y : y + h, x : x + w].ravel())
+        out.write(FRAME.pack(min(int(delay), 0xFFFF), x, y, w, h, len(payload)))
+        out.write(payload)
+        previous = frame
+    return out.getvalue()
+
+
+def decode_stream(data):
+    """
+    Decode a frame stream for validation.
+    Returns (frames as full-canvas HxW uint16 arrays, delays in ms, loop count).
+    """
+    magic, version, width, height, frame_count, loop, _ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a version %d RGB565 frame stream" % VERSION)
+    pos = HEADER.size
+    canvas = np.zeros((height, width), dtype=np.uint16)
+    frames = []
+    delays = []
+    for _ in range(frame_count):
+        delay, x, y, w, h, length = FRAME.unpack_from(data, pos)
+        pos += FRAME.size
+        if w and h:
+            pixels = rle_decode(memoryview(data)[pos : pos + length], w * h)
+            canvas[y : y + h, x : x + w] = pixels.reshape(h, w)
+        pos += length
+        frames.append(canvas.copy())
+        delays.append(delay)
+    return frames, delays, loop
+
+
+def export_gif(gif_path, output_path, box=DEFAULT_BOX, background=(0, 0, 0), verify=True):
+    """
+    Convert one GIF into a frame stream at output_path.
+    With verify=True the stream is decoded again and compared with the
+    encoder input. Returns a report dict with sizes and timings.
+    """
+    started = time.perf_counter()
+    frames, delays, loop = load_frames(gif_path, box, background)
+    frames565 = [dither_rgb565(frame) for frame in frames]
+    data = encode_frames(frames565, delays, loop)
+    encode_seconds = time.perf_counter() - started
+
+    tmp_path = output_path + ".part"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, output_path)
+
+    report = {
+        "path": output_path,
+        "gif_size": os.path.getsize(gif_path),
+        "size": len(data),
+        "raw_size": len(frames565) * box[0] * box[1] * 2,
+        "frames": len(frames565),
+        "encode_ms": encode_seconds * 1000,
+        # Bytes per second the device must read from SD to play at full speed
+        "playback_bytes_per_s": len(data) * 1000 / max(1, sum(delays)),
+    }
+    if verify:
+        started = time.perf_counter()
+        decoded, decoded_delays, _ = decode_stream(data)
+        decode_seconds = time.perf_counter() - started
+        report["decode_fps"] = len(decoded) / decode_seconds if decode_seconds else 0.0
+        report["verified"] = all(
+            np.array_equal(a, b) for a, b in zip(decoded, frames565)
+        ) and decoded_delays == [min(int(d), 0xFFFF) for d in delays]
+    return report
+
+
+def format_report(report):
+    line = (
+        f"{report['path']}: {report['frames']} frames, "
+        f"GIF {report['gif_size'] / 1024:.1f}KB -> stream {report['size'] / 1024:.1f}KB "
+        f"({report['size'] / report['raw_size']:.0%} of raw), "
+        f"encode {report['encode_ms']:.0f}ms, "
+        f"needs {report['playback_bytes_per_s'] / 1024:.1f}KB/s from SD"
+    )
+    if "verified" in report:
+        line += f", decode {report['decode_fps']:.0f} fps"
+        line += ", verified" if report["verified"] else ", MISMATCH"
+    return line
+
+
+def export_directory(directory, ids=None, box=DEFAULT_BOX, background=(0, 0, 0), verify=True):
+    """Export `{id}.gif` files in directory (all of them, or only ids). Returns reports."""
+    if ids is None:
+        ids = sorted(
+            int(name[: -len(".gif")])
+            for name in os.listdir(directory)
+            if name.endswith(".gif") and name[: -len(".gif")].isdigit()
+        )
+    reports = []
+    for pokemon_id in ids:
+        gif_path = os.path.join(directory, f"{pokemon_id}.gif")
+        if not os.path.exists(gif_path):
+            continue
+        output_path = os.path.join(directory, f"{pokemon_id}.565")
+        reports.append(export_gif(gif_path, output_path, box, background, verify))
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert fetched GIFs into RGB565 frame streams for the receiver display"
+    )
+    parser.add_argument("ids", nargs="*", type=int, help="Pokemon IDs (default: all GIFs)")
+    parser.add_argument(
+        "--dir",
+        default="pokemon",
+        help="Directory with the fetcher output (default: pokemon)",
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        nargs=2,
+        default=DEFAULT_BOX,
+        metavar=("WIDTH", "HEIGHT"),
+        help="Display box to scale frames into (default: 144 144)",
+    )
+    parser.add_argument(
+        "--background",
+        default="000000",
+        help="Background color as RRGGBB for transparent pixels (default: 000000)",
+    )
+    parser.add_argument(
+        "--no-verify",
+        action="store_true",
+        help="Skip decoding each stream again to validate it",
+    )
+    args = parser.parse_args()
+
+    reports = export_directory(
+        args.dir,
+        ids=args.ids or None,
+        box=tuple(args.size),
+        background=parse_color(args.background),
+        verify=not args.no_verify,
+    )
+    for report in reports:
+        print(format_report(report))
+    if reports:
+        total = sum(r["size"] for r in reports)
+        print(f"✅ Exported {len(reports)} frame streams ({total / 1024:.1f}KB total)")
+    if any(r.get("verified") is False for r in reports):
+        raise SystemExit("❌ Some frame streams did not decode back to their frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Per-stage timing and throughput metrics for pokemon_data_fetcher.py
+Collects latency histograms, bytes transferred, retries, cache hits and
+GIF compression savings, and writes them as a JSON summary and as a
+Prometheus textfile for the node exporter's textfile collector.
+"""
+
+import os
+import json
+import time
+import threading
+
+# Histogram bucket upper bounds in seconds (Prometheus `le` labels)
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+# Stages in the order they happen for one entry; "total" is a whole entry
+STAGES = ["list", "entry", "species", "png", "gif", "compress", "total"]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class _StageStats:
+    def __init__(self):
+        self.latencies = []
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+        self.cache_hits = 0
+
+    def observe(self, seconds, nbytes, retries, error, cache_hit):
+        self.latencies.append(seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.bytes += nbytes
+        self.retries += retries
+        self.errors += int(error)
+        self.cache_hits += int(cache_hit)
+
+    def summary(self):
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        cumulative = []
+        running = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.bucket_counts):
+            running += n
+            cumulative.append({"le": bound, "count": running})
+        return {
+            "count": count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "bytes": self.bytes,
+            "seconds_total": sum(ordered),
+            "latency": {
+                "mean": sum(ordered) / count if count else None,
+                "p50": percentile(ordered, 0.50),
+                "p90": percentile(ordered, 0.90),
+                "p99": percentile(ordered, 0.99),
+                "max": ordered[-1] if ordered else None,
+            },
+            "buckets": cumulative,
+        }
+
+
+class FetchMetrics:
+    """Thread-safe collector shared by the session, downloads and compressor."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stages = {}
+        self.entries = {"ok": 0, "failed": 0, "skipped": 0}
+        self.compression = {"files": 0, "bytes_before": 0, "bytes_after": 0, "passes": 0}
+
+    def observe(self, stage, seconds, nbytes=0, retries=0, error=False, cache_hit=False):
+        """Record one request or work item for a stage."""
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats()
+            stats.observe(seconds, nbytes, retries, error, cache_hit)
+
+    def observe_response(self, stage, seconds, resp, nbytes=None):
+        """
+        Record a requests.Response, including urllib3 retries behind it and
+        throttled attempts the session retried itself.
+        Bodies served from the local cache count as zero bytes transferred.
+        """
+        history = getattr(getattr(getattr(resp, "raw", None), "retries", None), "history", ())
+        retries = len(history or ()) + getattr(resp, "throttle_retries", 0)
+        cache_hit = getattr(resp, "from_cache", False)
+        if cache_hit:
+            nbytes = 0
+        elif nbytes is None:
+            nbytes = len(resp.content) if resp.status_code == 200 else 0
+        self.observe(
+            stage,
+            seconds,
+            nbytes=nbytes,
+            retries=retries,
+            error=resp.status_code >= 400,
+            cache_hit=cache_hit,
+        )
+
+    def observe_compression(self, report):
+        """Record a GIF optimizer report (see optimize_gif)."""
+        self.observe("compress", report.get("seconds", 0.0))
+        with self._lock:
+            self.compression["files"] += 1
+            self.compression["bytes_before"] += report["original_size"]
+            self.compression["bytes_after"] += report["size"]
+            self.compression["passes"] += report["passes"]
+
+    def count_entry(self, result):
+        with self._lock:
+            self.entries[result] += 1
+
+    def summary(self):
+        with self._lock:
+            order = {stage: i for i, stage in enumerate(STAGES)}
+            stages = {
+                stage: self._stages[stage].summary()
+                for stage in sorted(
+                    self._stages, key=lambda s: (order.get(s, len(STAGES)), s)
+                )
+            }
+            compression = dict(self.compression)
+            entries = dict(self.entries)
+        compression["bytes_saved"] = compression["bytes_before"] - compression["bytes_after"]
+        duration = time.time() - self.started
+        done = entries["ok"]
+        return {
+            "started_at": self.started,
+            "duration_seconds": duration,
+            "entries": entries,
+            "entries_per_second": done / duration if duration > 0 else None,
+            "stages": stages,
+            "compression": compression,
+        }
+
+    def format_summary(self):
+        """Short human-readable per-stage table for the end of a run."""
+        summary = self.summary()
+        lines = [f"Stage timing ({summary['duration_seconds']:.1f}s total):"]
+        for stage, stats in summary["stages"].items():
+            latency = stats["latency"]
+            lines.append(
+                f"  {stage:<9} {stats['count']:>6} calls  "
+                f"p50 {latency['p50'] * 1000:>7.0f}ms  p99 {latency['p99'] * 1000:>7.0f}ms  "
+                f"{stats['bytes'] / 1024 / 1024:>7.1f}MB  "
+                f"{stats['retries']} retries  {stats['cache_hits']} cached  {stats['errors']} errors"
+            )
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.summary(), indent=2))
+
+    def write_prometheus(self, path):
+        """Write the metrics in Prometheus text exposition format."""
+        summary = self.summary()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        stages = summary["stages"]
+        histogram = []
+        for stage, stats in stages.items():
+            for bucket in stats["buckets"]:
+                histogram.append(({"stage": stage, "le": bucket["le"]}, bucket["count"]))
+            histogram.append(({"stage": stage, "le": "+Inf"}, stats["count"]))
+        lines.append("# HELP pokedex_fetch_duration_seconds Latency of fetcher requests and work items by stage.")
+        lines.append("# TYPE pokedex_fetch_duration_seconds histogram")
+        for labels, value in histogram:
+            lines.append(
+                f'pokedex_fetch_duration_seconds_bucket{{stage="{labels["stage"]}",le="{labels["le"]}"}} {value}'
+            )
+        for stage, stats in stages.items():
+            lines.append(f'pokedex_fetch_duration_seconds_sum{{stage="{stage}"}} {stats["seconds_total"]}')
+            lines.append(f'pokedex_fetch_duration_seconds_count{{stage="{stage}"}} {stats["count"]}')
+
+        for field, help_text in [
+            ("bytes", "Response bytes received by stage."),
+            ("retries", "Retries after errors or throttling by stage."),
+            ("errors", "Failed requests by stage."),
+            ("cache_hits", "Responses served from the local HTTP cache by stage."),
+        ]:
+            metric(
+                f"pokedex_fetch_{field}_total",
+                "counter",
+                help_text,
+                [({"stage": stage}, stats[field]) for stage, stats in stages.items()],
+            )
+        metric(
+            "pokedex_fetch_entries_total",
+            "counter",
+            "Entries processed by result.",
+            [({"result": result}, count) for result, count in summary["entries"].items()],
+        )
+        compression = summary["compression"]
+        metric(
+            "pokedex_gif_compression_bytes_saved_total",
+            "counter",
+            "Bytes removed from GIFs by compression.",
+            [({}, compression["bytes_saved"])],
+        )
+        metric(
+            "pokedex_gif_compression_files_total",
+            "counter",
+            "GIFs run through the optimizer.",
+            [({}, compression["files"])],
+        )
+        metric(
+            "pokedex_gif_compression_passes_total",
+            "counter",
+            "Encode passes spent by the GIF optimizer.",
+            [({}, compression["passes"])],
+        )
+        metric(
+            "pokedex_fetch_run_duration_seconds",
+            "gauge",
+            "Wall-clock duration of the last sync.",
+            [({}, summary["duration_seconds"])],
+        )
+        metric(
+            "pokedex_fetch_last_run_timestamp_seconds",
+            "gauge",
+            "Unix time the last sync finished.",
+            [({}, time.time())],
+        )
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+
+def _write_atomic(path, text):
+    # The textfile collector may read at any moment, so never expose a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
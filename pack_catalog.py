@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+Packed binary Pokedex catalog
+Packs the per-pokemon JSON files written by pokemon_data_fetcher.py and
+their GIFs into a single file of fixed-size records, so the receiver can
+look a pokemon up with one seek and one read instead of parsing JSON.
+
+File layout (all integers little-endian):
+
+Header, 24 bytes:
+    magic "PKDX", version (u16), record size (u16), record count (u32),
+    range count (u16), ability count (u16), records offset (u32), GIF area offset (u32)
+
+Range table, 8 bytes per range, directly after the header:
+    first id (u16), id count (u16), first record slot (u32)
+    Record slot for an id = first slot + (id - first id) of the range that
+    contains it. IDs are grouped into ranges (e.g. 1-1025 and 10001-10277),
+    so the table is tiny and can be kept in RAM.
+
+Ability table, 32 bytes per ability, directly after the range table:
+    ability name (UTF-8, NUL padded), sorted; records refer to it by index.
+
+Records, RECORD_SIZE bytes each, starting at the records offset:
+    id (u16, 0 = empty slot), height (u16, decimetres), weight (u16, hectograms),
+    type1 (u8), type2 (u8), stats (6 x u8), abilities (3 x u16),
+    names en/zh/ja/ko (4 x 32 bytes UTF-8, NUL padded),
+    GIF offset (u32, absolute, 0 = none), GIF length (u32)
+
+Record offset = records offset + slot * RECORD_SIZE.
+Types are indexes into TYPES, 0xFF means no type. Abilities are indexes
+into the ability table, 0xFFFF means no ability; only the first three are kept.
+Names longer than 31 bytes are cut on a character boundary, and build warns
+about every name it cuts.
+"""
+
+import os
+import json
+import struct
+import argparse
+import tempfile
+
+MAGIC = b"PKDX"
+VERSION = 2
+
+HEADER = struct.Struct("<4sHHIHHII")
+RANGE = struct.Struct("<HHI")
+RECORD = struct.Struct("<HHHBB6B3H32s32s32s32sII")
+RECORD_SIZE = RECORD.size
+
+NAME_SLOT = 32
+NAME_LANGS = ["en", "zh", "ja", "ko"]
+STATS = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+TYPES = [
+    "normal",
+    "fighting",
+    "flying",
+    "poison",
+    "ground",
+    "rock",
+    "bug",
+    "ghost",
+    "steel",
+    "fire",
+    "water",
+    "grass",
+    "electric",
+    "psychic",
+    "ice",
+    "dragon",
+    "dark",
+    "fairy",
+]
+NO_TYPE = 0xFF
+UNKNOWN_TYPE = 0xFE
+ABILITY_SLOTS = 3
+NO_ABILITY = 0xFFFF
+
+# IDs closer together than this share a range (the gap is filled with empty slots)
+MAX_RANGE_GAP = 16
+# GIF data is aligned so the receiver can read it with word-sized copies
+GIF_ALIGN = 4
+
+# mkstemp creates files as 0600; the catalog gets the mode open() would give it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def encode_name(name):
+    """UTF-8 encode a name into a NUL-terminated slot, cutting on a character boundary."""
+    raw = (name or "").encode("utf-8")[: NAME_SLOT - 1]
+    return raw.decode("utf-8", "ignore").encode("utf-8")
+
+
+def name_fits(name):
+    """Whether name is stored in full, without being cut to its slot."""
+    return len((name or "").encode("utf-8")) < NAME_SLOT
+
+
+def decode_name(raw):
+    return raw.split(b"\0", 1)[0].decode("utf-8")
+
+
+def encode_type(name):
+    if name is None:
+        return NO_TYPE
+    try:
+        return TYPES.index(name)
+    except ValueError:
+        return UNKNOWN_TYPE
+
+
+def decode_type(value):
+    if value == NO_TYPE:
+        return None
+    if value == UNKNOWN_TYPE:
+        return "unknown"
+    return TYPES[value]
+
+
+def _clamp(value, limit):
+    return max(0, min(int(value or 0), limit))
+
+
+def build_ranges(ids):
+    """Group sorted ids into (first_id, count, first_slot) ranges."""
+    ranges = []
+    slot = 0
+    for pokemon_id in sorted(ids):
+        if ranges:
+            first_id, count, first_slot = ranges[-1]
+            if pokemon_id - (first_id + count - 1) <= MAX_RANGE_GAP:
+                ranges[-1] = (first_id, pokemon_id - first_id + 1, first_slot)
+                continue
+            slot = first_slot + count
+        ranges.append((pokemon_id, 1, slot))
+    return ranges
+
+
+def load_records(directory):
+    """Read every `{id}.json` in directory, keyed by id."""
+    records = {}
+    for name in os.listdir(directory):
+        stem, ext = os.path.splitext(name)
+        if ext != ".json" or not stem.isdigit():
+            continue
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            records[int(stem)] = json.load(f)
+    return records
+
+
+def build_catalog(directory, output_path):
+    """
+    Pack all records and GIFs from directory into output_path.
+    The file is written to a temp file and renamed into place.
+    Returns the number of records written.
+    """
+    records = load_records(directory)
+    ranges = build_ranges(records)
+    abilities = sorted(
+        {a for info in records.values() for a in (info.get("abilities") or [])[:ABILITY_SLOTS]}
+    )
+    ability_index = {name: i for i, name in enumerate(abilities)}
+    for pokemon_id in sorted(records):
+        names = records[pokemon_id].get("names") or {}
+        for lang in NAME_LANGS:
+            if not name_fits(names.get(lang)):
+                print(
+                    f"⚠️  #{pokemon_id}: {lang} name {names[lang]!r} cut to "
+                    f"{decode_name(encode_name(names[lang]))!r}"
+                )
+    for name in abilities:
+        if not name_fits(name):
+            print(f"⚠️  ability {name!r} cut to {decode_name(encode_name(name))!r}")
+
+    slot_count = sum(count for _, count, _ in ranges)
+    table_offset = HEADER.size + RANGE.size * len(ranges)
+    records_offset = table_offset + NAME_SLOT * len(abilities)
+    gif_area = records_offset + slot_count * RECORD_SIZE
+    gif_area += -gif_area % GIF_ALIGN
+
+    out_dir = os.path.dirname(output_path) or "."
+    fd, tmp_path = tempfile.mkstemp(
+        dir=out_dir, prefix=f".{os.path.basename(output_path)}.", suffix=".part"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    RECORD_SIZE,
+                    slot_count,
+                    len(ranges),
+                    len(abilities),
+                    records_offset,
+                    gif_area,
+                )
+            )
+            for first_id, count, first_slot in ranges:
+                f.write(RANGE.pack(first_id, count, first_slot))
+            for name in abilities:
+                f.write(encode_name(name).ljust(NAME_SLOT, b"\0"))
+
+            # GIFs are appended after the record area, records are filled in as we go
+            gif_offset = gif_area
+            empty = b"\0" * RECORD_SIZE
+            for first_id, count, first_slot in ranges:
+                for pokemon_id in range(first_id, first_id + count):
+                    record_pos = records_offset + (first_slot + pokemon_id - first_id) * RECORD_SIZE
+                    info = records.get(pokemon_id)
+                    f.seek(record_pos)
+                    if info is None:
+                        f.write(empty)
+                        continue
+
+                    gif_length = 0
+                    gif_start = 0
+                    gif_path = os.path.join(directory, f"{pokemon_id}.gif")
+                    if os.path.exists(gif_path):
+                        with open(gif_path, "rb") as g:
+                            gif_data = g.read()
+                        gif_start = gif_offset
+                        gif_length = len(gif_data)
+                        f.seek(gif_start)
+                        f.write(gif_data)
+                        gif_offset += gif_length + (-gif_length % GIF_ALIGN)
+                        f.seek(record_pos)
+
+                    types = (info.get("types") or []) + [None, None]
+                    stats = info.get("stats") or {}
+                    names = info.get("names") or {}
+                    ability_ids = [
+                        ability_index[a] for a in (info.get("abilities") or [])[:ABILITY_SLOTS]
+                    ]
+                    ability_ids += [NO_ABILITY] * (ABILITY_SLOTS - len(ability_ids))
+                    f.write(
+                        RECORD.pack(
+                            pokemon_id,
+                            _clamp(info.get("height"), 0xFFFF),
+                            _clamp(info.get("weight"), 0xFFFF),
+                            encode_type(types[0]),
+                            encode_type(types[1]),
+                            *[_clamp(stats.get(stat), 0xFF) for stat in STATS],
+                            *ability_ids,
+                            *[encode_name(names.get(lang)) for lang in NAME_LANGS],
+                            gif_start,
+                            gif_length,
+                        )
+                    )
+            f.seek(0, os.SEEK_END)
+            if f.tell() < gif_area:
+                f.truncate(gif_area)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return len(records)
+
+
+class CatalogReader:
+    """Random-access reader for catalogs written by build_catalog."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        (
+            magic,
+            version,
+            record_size,
+            self.record_count,
+            range_count,
+            ability_count,
+            self.records_offset,
+            self.gif_area,
+        ) = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self._file.close()
+            raise ValueError(f"{path} is not a version {VERSION} Pokedex catalog")
+        table = self._file.read(RANGE.size * range_count)
+        self.ranges = [
+            RANGE.unpack_from(table, i * RANGE.size) for i in range(range_count)
+        ]
+        table = self._file.read(NAME_SLOT * ability_count)
+        self.abilities = [
+            decode_name(table[i : i + NAME_SLOT])
+            for i in range(0, len(table), NAME_SLOT)
+        ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def record_offset(self, pokemon_id):
+        """File offset of the record for pokemon_id, or None if out of range."""
+        for first_id, count, first_slot in self.ranges:
+            if first_id <= pokemon_id < first_id + count:
+                return self.records_offset + (first_slot + pokemon_id - first_id) * RECORD_SIZE
+        return None
+
+    def _read_record(self, pokemon_id):
+        offset = self.record_offset(pokemon_id)
+        if offset is None:
+            return None
+        self._file.seek(offset)
+        fields = RECORD.unpack(self._file.read(RECORD_SIZE))
+        if fields[0] != pokemon_id:
+            return None
+        return fields
+
+    def ids(self):
+        """All ids present in the catalog, in order."""
+        found = []
+        for first_id, count, _ in self.ranges:
+            for pokemon_id in range(first_id, first_id + count):
+                if self._read_record(pokemon_id):
+                    found.append(pokemon_id)
+        return found
+
+    def get(self, pokemon_id):
+        """Return the record as a dict shaped like the fetcher's JSON, or None."""
+        fields = self._read_record(pokemon_id)
+        if fields is None:
+            return None
+        _, height, weight, type1, type2 = fields[:5]
+        stats = fields[5:11]
+        abilities = [self.abilities[i] for i in fields[11:14] if i != NO_ABILITY]
+        names = {
+            lang: decode_name(raw) for lang, raw in zip(NAME_LANGS, fields[14:18])
+        }
+        names = {lang: name for lang, name in names.items() if name}
+        return {
+            "id": pokemon_id,
+            "name": names.get("zh", names.get("en")),
+            "names": names,
+            "types": [t for t in (decode_type(type1), decode_type(type2)) if t],
+            "abilities": abilities,
+            "stats": dict(zip(STATS, stats)),
+            "height": height,
+            "weight": weight,
+        }
+
+    def gif(self, pokemon_id):
+        """Return the GIF bytes for pokemon_id, or None if it has none."""
+        fields = self._read_record(pokemon_id)
+        if fields is None or not fields[19]:
+            return None
+        self._file.seek(fields[18])
+        return self._file.read(fields[19])
+
+
+def verify_catalog(directory, catalog_path):
+    """
+    Round-trip check: compare every JSON/GIF in directory against the catalog.
+    Returns a list of human-readable mismatches (empty when they agree).
+    """
+    problems = []
+    records = load_records(directory)
+    with CatalogReader(catalog_path) as reader:
+        stored_ids = set(reader.ids())
+        for pokemon_id in sorted(set(records) - stored_ids):
+            problems.append(f"#{pokemon_id}: missing from catalog")
+        for pokemon_id in sorted(stored_ids - set(records)):
+            problems.append(f"#{pokemon_id}: in catalog but not in {directory}")
+
+        for pokemon_id in sorted(stored_ids & set(records)):
+            info = records[pokemon_id]
+            got = reader.get(pokemon_id)
+            names = {
+                lang: decode_name(encode_name(info.get("names", {}).get(lang)))
+                for lang in NAME_LANGS
+            }
+            expected = {
+                "names": {lang: name for lang, name in names.items() if name},
+                "types": [
+                    decode_type(encode_type(t)) for t in (info.get("types") or [])[:2]
+                ],
+                "abilities": [
+                    decode_name(encode_name(a))
+                    for a in (info.get("abilities") or [])[:ABILITY_SLOTS]
+                ],
+                "stats": {
+                    stat: _clamp((info.get("stats") or {}).get(stat), 0xFF)
+                    for stat in STATS
+                },
+                "height": _clamp(info.get("height"), 0xFFFF),
+                "weight": _clamp(info.get("weight"), 0xFFFF),
+            }
+            for field, value in expected.items():
+                if got[field] != value:
+                    problems.append(
+                        f"#{pokemon_id}: {field} is {got[field]!r}, expected {value!r}"
+                    )
+
+            gif_path = os.path.join(directory, f"{pokemon_id}.gif")
+            gif = reader.gif(pokemon_id)
+            if os.path.exists(gif_path):
+                with open(gif_path, "rb") as f:
+                    if f.read() != gif:
+                        problems.append(f"#{pokemon_id}: GIF data differs")
+            elif gif is not None:
+                problems.append(f"#{pokemon_id}: GIF in catalog but not on disk")
+    return problems
+
+
+def self_test():
+    """
+    Build a catalog from synthetic records in a temp directory and read every
+    field back, without needing fetched data. Covers a gap between ids, a
+    second id range, a missing GIF, an unknown type, clamped values and names
+    and abilities cut to their slots. Returns a list of mismatches.
+    """
+    long_name = "ア" * 12  # 36 bytes of UTF-8, cut to 10 characters
+    samples = {
+        1: (
+            {
+                "names": {"en": "mon1", "zh": "怪1", "ja": "モン1", "ko": "몬1"},
+                "types": ["grass", "poison"],
+                "abilities": ["overgrow", "chlorophyll"],
+                "stats": dict(zip(STATS, [45, 49, 49, 65, 65, 45])),
+                "height": 7,
+                "weight": 69,
+            },
+            b"GIF89a" + bytes(range(256)) * 3,
+        ),
+        3: (
+            {
+                "names": {"en": "x" * 40, "ja": long_name},
+                "types": ["shadow"],
+                "abilities": ["a", "b", "c", "dropped", "y" * 40],
+                "stats": dict(zip(STATS, [300, 0, 1, 2, 3, 255])),
+                "height": 70000,
+                "weight": None,
+            },
+            None,
+        ),
+        10001: (
+            {
+                "names": {"zh": "怪10001"},
+                "types": [],
+                "stats": {},
+                "height": 17,
+                "weight": 1205,
+            },
+            b"GIF89a\x01",
+        ),
+    }
+    expected = {
+        1: (
+            {
+                "id": 1,
+                "name": "怪1",
+                "names": {"en": "mon1", "zh": "怪1", "ja": "モン1", "ko": "몬1"},
+                "types": ["grass", "poison"],
+                "abilities": ["overgrow", "chlorophyll"],
+                "stats": dict(zip(STATS, [45, 49, 49, 65, 65, 45])),
+                "height": 7,
+                "weight": 69,
+            },
+            samples[1][1],
+        ),
+        3: (
+            {
+                "id": 3,
+                "name": "x" * 31,
+                "names": {"en": "x" * 31, "ja": "ア" * 10},
+                "types": ["unknown"],
+                "abilities": ["a", "b", "c"],
+                "stats": dict(zip(STATS, [255, 0, 1, 2, 3, 255])),
+                "height": 0xFFFF,
+                "weight": 0,
+            },
+            None,
+        ),
+        10001: (
+            {
+                "id": 10001,
+                "name": "怪10001",
+                "names": {"zh": "怪10001"},
+                "types": [],
+                "abilities": [],
+                "stats": dict.fromkeys(STATS, 0),
+                "height": 17,
+                "weight": 1205,
+            },
+            samples[10001][1],
+        ),
+    }
+
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        for pokemon_id, (info, gif) in samples.items():
+            with open(os.path.join(directory, f"{pokemon_id}.json"), "w", encoding="utf-8") as f:
+                json.dump(dict(info, id=pokemon_id), f, ensure_ascii=False)
+            if gif is not None:
+                with open(os.path.join(directory, f"{pokemon_id}.gif"), "wb") as f:
+                    f.write(gif)
+        catalog_path = os.path.join(directory, "pokedex.bin")
+        build_catalog(directory, catalog_path)
+
+        with CatalogReader(catalog_path) as reader:
+            if reader.ids() != sorted(expected):
+                problems.append(f"ids are {reader.ids()}, expected {sorted(expected)}")
+            for missing in (2, 4, 10000, 10002):
+                if reader.get(missing) is not None or reader.gif(missing) is not None:
+                    problems.append(f"#{missing}: read back from an empty slot")
+            for pokemon_id, (info, gif) in expected.items():
+                got = reader.get(pokemon_id) or {}
+                for field, value in info.items():
+                    if got.get(field) != value:
+                        problems.append(
+                            f"#{pokemon_id}: {field} is {got.get(field)!r}, expected {value!r}"
+                        )
+                if reader.gif(pokemon_id) != gif:
+                    problems.append(f"#{pokemon_id}: GIF data differs")
+        problems += verify_catalog(directory, catalog_path)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pack fetched Pokemon data into a binary catalog for the receiver"
+    )
+    parser.add_argument(
+        "command",
+        choices=["build", "verify", "show", "selftest"],
+        help="build the catalog, verify it against the JSON files, show entries, "
+        "or check the format with synthetic records",
+    )
+    parser.add_argument("ids", nargs="*", type=int, help="Pokemon IDs for 'show'")
+    parser.add_argument(
+        "--dir",
+        default="pokemon",
+        help="Directory with the fetcher output (default: pokemon)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        default=None,
+        help="Catalog path (default: <dir>/pokedex.bin)",
+    )
+    args = parser.parse_args()
+    catalog_path = args.output or os.path.join(args.dir, "pokedex.bin")
+
+    if args.command == "build":
+        count = build_catalog(args.dir, catalog_path)
+        size = os.path.getsize(catalog_path)
+        print(f"✅ Packed {count} Pokemon into {catalog_path} ({size / 1024:.1f}KB)")
+    elif args.command == "verify":
+        problems = verify_catalog(args.dir, catalog_path)
+        for problem in problems:
+            print(problem)
+        if problems:
+            raise SystemExit(f"❌ {len(problems)} mismatches in {catalog_path}")
+        print(f"✅ {catalog_path} matches {args.dir}")
+    elif args.command == "selftest":
+        problems = self_test()
+        for problem in problems:
+            print(problem)
+        if problems:
+            raise SystemExit(f"❌ {len(problems)} mismatches in the synthetic catalog")
+        print("✅ Synthetic catalog reads back field by field")
+    else:
+        with CatalogReader(catalog_path) as reader:
+            for pokemon_id in args.ids:
+                info = reader.get(pokemon_id)
+                gif = reader.gif(pokemon_id)
+                print(json.dumps(info, ensure_ascii=False))
+                print(f"GIF: {len(gif) if gif else 0} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Indexed SQLite Pokedex catalog
+Keeps the per-pokemon JSON files written by pokemon_data_fetcher.py in one
+SQLite database, so lookups by name in any language, type, ability or stat
+are indexed queries instead of opening every `{id}.json` file.
+
+Tables:
+    pokemon    id, default name, height, weight, sprite file names and sizes
+    names      (pokemon_id, lang) -> name, indexed case-insensitively by name
+    types      (pokemon_id, slot) -> type, indexed by type
+    abilities  (pokemon_id, slot) -> ability, indexed by ability
+    stats      (pokemon_id, stat) -> value, indexed by (stat, value)
+
+The fetcher upserts each entry as it completes; `sync` brings an existing
+database up to date with a directory by re-reading only changed files.
+Readers such as create_poster.py open it read-only, so they never migrate it.
+"""
+
+import os
+import json
+import sqlite3
+import pathlib
+import argparse
+import threading
+
+DEFAULT_NAME = "pokedex.db"
+
+# Bump when SCHEMA changes; older databases are dropped and rebuilt by writers
+SCHEMA_VERSION = 1
+
+# Ids per IN (...) list, well under SQLite's default limit of 999 variables
+IN_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE pokemon (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    height INTEGER,
+    weight INTEGER,
+    png_path TEXT,
+    png_size INTEGER,
+    gif_path TEXT,
+    gif_size INTEGER,
+    json_mtime_ns INTEGER
+);
+CREATE TABLE names (
+    pokemon_id INTEGER NOT NULL REFERENCES pokemon(id) ON DELETE CASCADE,
+    lang TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (pokemon_id, lang)
+);
+CREATE INDEX names_by_name ON names (name COLLATE NOCASE, lang);
+CREATE TABLE types (
+    pokemon_id INTEGER NOT NULL REFERENCES pokemon(id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    PRIMARY KEY (pokemon_id, slot)
+);
+CREATE INDEX types_by_type ON types (type);
+CREATE TABLE abilities (
+    pokemon_id INTEGER NOT NULL REFERENCES pokemon(id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL,
+    ability TEXT NOT NULL,
+    PRIMARY KEY (pokemon_id, slot)
+);
+CREATE INDEX abilities_by_ability ON abilities (ability);
+CREATE TABLE stats (
+    pokemon_id INTEGER NOT NULL REFERENCES pokemon(id) ON DELETE CASCADE,
+    stat TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (pokemon_id, stat)
+);
+CREATE INDEX stats_by_value ON stats (stat, value);
+"""
+
+TABLES = ["stats", "abilities", "types", "names", "pokemon"]
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+class PokedexDB:
+    """
+    Thread-safe handle on the catalog database.
+    directory is where the JSON and sprite files live (default: next to path).
+    A readonly handle never creates, migrates or writes the database, and
+    raises ValueError if it was built with a different schema version.
+    """
+
+    def __init__(self, path, directory=None, readonly=False):
+        self.path = path
+        self.directory = directory or os.path.dirname(path) or "."
+        self._lock = threading.Lock()
+        if readonly:
+            uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+            self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self.connection.close()
+                raise ValueError(
+                    f"{path} has schema version {version}, expected {SCHEMA_VERSION}"
+                )
+            return
+        # The fetcher upserts from download and compression threads
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self._create_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM pokemon").fetchone()[0]
+
+    def _create_schema(self):
+        with self._lock, self.connection:
+            for table in TABLES:
+                self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def upsert(self, info):
+        """Insert or replace one entry (a dict shaped like the fetcher's JSON)."""
+        pokemon_id = info["id"]
+        json_path = os.path.join(self.directory, f"{pokemon_id}.json")
+        try:
+            json_mtime_ns = os.stat(json_path).st_mtime_ns
+        except OSError:
+            json_mtime_ns = None
+        sprites = {}
+        for ext in ("png", "gif"):
+            name = f"{pokemon_id}.{ext}"
+            size = _file_size(os.path.join(self.directory, name))
+            sprites[ext] = (name if size is not None else None, size)
+
+        with self._lock, self.connection:
+            self._upsert_locked(pokemon_id, info, sprites, json_mtime_ns)
+
+    def _upsert_locked(self, pokemon_id, info, sprites, json_mtime_ns):
+        db = self.connection
+        # Deleting the row cascades to its names, types, abilities and stats
+        db.execute("DELETE FROM pokemon WHERE id = ?", (pokemon_id,))
+        db.execute(
+            "INSERT INTO pokemon VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                pokemon_id,
+                info.get("name"),
+                info.get("height"),
+                info.get("weight"),
+                *sprites["png"],
+                *sprites["gif"],
+                json_mtime_ns,
+            ),
+        )
+        db.executemany(
+            "INSERT INTO names VALUES (?, ?, ?)",
+            [
+                (pokemon_id, lang, name)
+                for lang, name in (info.get("names") or {}).items()
+                if name
+            ],
+        )
+        db.executemany(
+            "INSERT INTO types VALUES (?, ?, ?)",
+            [(pokemon_id, slot, t) for slot, t in enumerate(info.get("types") or [])],
+        )
+        db.executemany(
+            "INSERT INTO abilities VALUES (?, ?, ?)",
+            [
+                (pokemon_id, slot, a)
+                for slot, a in enumerate(info.get("abilities") or [])
+            ],
+        )
+        db.executemany(
+            "INSERT INTO stats VALUES (?, ?, ?)",
+            [
+                (pokemon_id, stat, value)
+                for stat, value in (info.get("stats") or {}).items()
+                if value is not None
+            ],
+        )
+
+    def sync(self):
+        """
+        Bring the database up to date with the directory in one scan.
+        Only entries whose JSON changed or whose sprite sizes differ are read
+        again, and entries whose JSON is gone are removed.
+        Returns (updated, removed) counts.
+        """
+        on_disk = {}
+        sizes = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if not stem.isdigit():
+                    continue
+                if ext == ".json":
+                    on_disk[int(stem)] = entry.stat().st_mtime_ns
+                elif ext in (".png", ".gif"):
+                    sizes[entry.name] = entry.stat().st_size
+
+        with self._lock:
+            known = {
+                row["id"]: row
+                for row in self.connection.execute(
+                    "SELECT id, json_mtime_ns, png_path, png_size, gif_path, gif_size FROM pokemon"
+                )
+            }
+
+        updated = 0
+        for pokemon_id, mtime_ns in sorted(on_disk.items()):
+            sprites = {}
+            for ext in ("png", "gif"):
+                name = f"{pokemon_id}.{ext}"
+                sprites[ext] = (name, sizes[name]) if name in sizes else (None, None)
+            row = known.get(pokemon_id)
+            if (
+                row is not None
+                and row["json_mtime_ns"] == mtime_ns
+                and (row["png_path"], row["png_size"]) == sprites["png"]
+                and (row["gif_path"], row["gif_size"]) == sprites["gif"]
+            ):
+                continue
+            with open(
+                os.path.join(self.directory, f"{pokemon_id}.json"), "r", encoding="utf-8"
+            ) as f:
+                info = json.load(f)
+            with self._lock, self.connection:
+                self._upsert_locked(pokemon_id, info, sprites, mtime_ns)
+            updated += 1
+
+        removed = sorted(set(known) - set(on_disk))
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "DELETE FROM pokemon WHERE id = ?", [(i,) for i in removed]
+            )
+        return updated, len(removed)
+
+    def rebuild(self):
+        """Drop everything and load the directory from scratch."""
+        self._create_schema()
+        return self.sync()[0]
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def get(self, pokemon_id):
+        """Return the entry as a dict shaped like the fetcher's JSON plus sprites, or None."""
+        rows = self._query("SELECT * FROM pokemon WHERE id = ?", (pokemon_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "names": {
+                r["lang"]: r["name"]
+                for r in self._query(
+                    "SELECT lang, name FROM names WHERE pokemon_id = ?", (pokemon_id,)
+                )
+            },
+            "types": [
+                r["type"]
+                for r in self._query(
+                    "SELECT type FROM types WHERE pokemon_id = ? ORDER BY slot",
+                    (pokemon_id,),
+                )
+            ],
+            "abilities": [
+                r["ability"]
+                for r in self._query(
+                    "SELECT ability FROM abilities WHERE pokemon_id = ? ORDER BY slot",
+                    (pokemon_id,),
+                )
+            ],
+            "stats": {
+                r["stat"]: r["value"]
+                for r in self._query(
+                    "SELECT stat, value FROM stats WHERE pokemon_id = ?", (pokemon_id,)
+                )
+            },
+            "height": row["height"],
+            "weight": row["weight"],
+            "sprites": {
+                "png": {"path": row["png_path"], "size": row["png_size"]},
+                "gif": {"path": row["gif_path"], "size": row["gif_size"]},
+            },
+        }
+
+    def names(self, lang, ids=None):
+        """Map id -> name in lang for all entries (or only ids) that have one."""
+        sql = "SELECT pokemon_id, name FROM names WHERE lang = ?"
+        if ids is None:
+            return {r["pokemon_id"]: r["name"] for r in self._query(sql, (lang,))}
+        ids = sorted(set(ids))
+        names = {}
+        for i in range(0, len(ids), IN_CHUNK):
+            chunk = ids[i : i + IN_CHUNK]
+            rows = self._query(
+                f"{sql} AND pokemon_id IN ({', '.join('?' * len(chunk))})", (lang, *chunk)
+            )
+            names.update((r["pokemon_id"], r["name"]) for r in rows)
+        return names
+
+    def find_name(self, name, lang=None):
+        """IDs whose name matches exactly (ignoring case), in any language or in lang."""
+        sql = "SELECT DISTINCT pokemon_id FROM names WHERE name = ? COLLATE NOCASE"
+        params = [name]
+        if lang:
+            sql += " AND lang = ?"
+            params.append(lang)
+        return [r[0] for r in self._query(sql + " ORDER BY pokemon_id", params)]
+
+    def query(self, type=None, ability=None, min_stats=None, max_stats=None):
+        """
+        IDs matching every given condition, in order.
+        min_stats/max_stats map stat names to inclusive bounds, e.g.
+        query(type="fire", min_stats={"speed": 101}) for fire types with speed > 100.
+        """
+        sql = ["SELECT id FROM pokemon WHERE 1"]
+        params = []
+        if type:
+            sql.append("AND id IN (SELECT pokemon_id FROM types WHERE type = ?)")
+            params.append(type)
+        if ability:
+            sql.append("AND id IN (SELECT pokemon_id FROM abilities WHERE ability = ?)")
+            params.append(ability)
+        for bounds, op in ((min_stats, ">="), (max_stats, "<=")):
+            for stat, value in (bounds or {}).items():
+                sql.append(
+                    f"AND id IN (SELECT pokemon_id FROM stats WHERE stat = ? AND value {op} ?)"
+                )
+                params.extend([stat, value])
+        sql.append("ORDER BY id")
+        return [r[0] for r in self._query(" ".join(sql), params)]
+
+
+def parse_bounds(values):
+    """Parse ['speed=100', ...] into {'speed': 100, ...}."""
+    bounds = {}
+    for value in values or []:
+        stat, _, number = value.partition("=")
+        bounds[stat] = int(number)
+    return bounds
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build and query the SQLite catalog of fetched Pokemon data"
+    )
+    parser.add_argument(
+        "command",
+        choices=["sync", "rebuild", "show", "find", "query"],
+        help="sync changed files, rebuild from scratch, show IDs, find a name, or query",
+    )
+    parser.add_argument("terms", nargs="*", help="IDs for 'show', a name for 'find'")
+    parser.add_argument(
+        "--dir",
+        default="pokemon",
+        help="Directory with the fetcher output (default: pokemon)",
+    )
+    parser.add_argument(
+        "--db",
+        default=None,
+        help=f"Database path (default: <dir>/{DEFAULT_NAME})",
+    )
+    parser.add_argument("--lang", help="Language for 'find' (default: any)")
+    parser.add_argument("--type", help="Type for 'query', e.g. fire")
+    parser.add_argument("--ability", help="Ability for 'query'")
+    parser.add_argument(
+        "--min",
+        action="append",
+        metavar="STAT=N",
+        help="Minimum stat for 'query', e.g. --min speed=101 (repeatable)",
+    )
+    parser.add_argument(
+        "--max",
+        action="append",
+        metavar="STAT=N",
+        help="Maximum stat for 'query' (repeatable)",
+    )
+    args = parser.parse_args()
+    db_path = args.db or os.path.join(args.dir, DEFAULT_NAME)
+
+    # Lookups must not migrate (and so empty) a database built by another version
+    readonly = args.command in ("show", "find", "query")
+    if readonly and not os.path.exists(db_path):
+        raise SystemExit(f"❌ {db_path} does not exist, run 'sync' first")
+    try:
+        db = PokedexDB(db_path, args.dir, readonly=readonly)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}, run 'rebuild' first")
+
+    with db:
+        if args.command == "sync":
+            updated, removed = db.sync()
+            print(f"✅ {db_path}: {updated} updated, {removed} removed, {len(db)} total")
+        elif args.command == "rebuild":
+            count = db.rebuild()
+            print(f"✅ Rebuilt {db_path} with {count} Pokemon")
+        elif args.command == "show":
+            for pokemon_id in args.terms:
+                print(json.dumps(db.get(int(pokemon_id)), ensure_ascii=False))
+        elif args.command == "find":
+            for pokemon_id in db.find_name(" ".join(args.terms), args.lang):
+                print(json.dumps(db.get(pokemon_id), ensure_ascii=False))
+        else:
+            ids = db.query(
+                type=args.type,
+                ability=args.ability,
+                min_stats=parse_bounds(args.min),
+                max_stats=parse_bounds(args.max),
+            )
+            names = db.names("en", ids)
+            for pokemon_id in ids:
+                print(f"#{pokemon_id} {names.get(pokemon_id, '')}")
+            print(f"{len(ids)} matches")
+
+
+if __name__ == "__main__":
+    main()
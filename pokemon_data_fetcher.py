@@ -1,85 +1,950 @@
 import os
+import re
+import math
 import json
 import argparse
 import requests
 import subprocess
 import shutil
+import threading
+import multiprocessing
+import hashlib
+import email.utils
+import tempfile
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    FIRST_COMPLETED,
+    wait,
+)
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlsplit
 from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 from urllib3.util.retry import Retry
 
-# Directory to save Pokemon data
+from fetch_metrics import FetchMetrics
+from pack_catalog import build_catalog
+from pokedex_db import DEFAULT_NAME as DB_NAME, PokedexDB
+
+# Default directory to save Pokemon data, overridable with --output-dir
 POKEMON_DIR = "pokemon"
 
-# Ensure the directory exists
-os.makedirs(POKEMON_DIR, exist_ok=True)
+# PokeAPI root, overridable with --api-base (e.g. for a local stub server)
+API_BASE = "https://pokeapi.co/api/v2"
+
+# Read size used when streaming sprite downloads to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Entries requested per page of the /pokemon list endpoint
+LIST_PAGE_SIZE = 100
+
+# mkstemp creates files as 0600; renamed outputs get the mode open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+# Per-entry log buffering so concurrent workers don't interleave their lines
+_log_state = threading.local()
+_print_lock = threading.Lock()
+
+
+def log(message):
+    """Print a line, or buffer it if we are inside an entry_log() block."""
+    buffer = getattr(_log_state, "buffer", None)
+    if buffer is None:
+        with _print_lock:
+            print(message, flush=True)
+    else:
+        buffer.append(message)
+
+
+@contextmanager
+def entry_log(buffered=True):
+    """Collect log lines for one entry and print them together at the end."""
+    if not buffered:
+        yield
+        return
+    _log_state.buffer = []
+    try:
+        yield
+    finally:
+        lines = _log_state.buffer
+        _log_state.buffer = None
+        if lines:
+            with _print_lock:
+                print("\n".join(lines), flush=True)
+
+
+class HostLimiter:
+    """
+    Adaptive cap on the number of in-flight requests per host (AIMD).
+    Each host starts at per_host slots, the most it can ever use (the worker
+    count unless --max-per-host is given). Every successful response adds
+    1/limit to the host's limit, so it grows by about one slot per round of
+    requests, up to per_host; a 429 or 503 halves it, at most once per round,
+    and pauses the host for its Retry-After (or an exponential backoff).
+    The request rate is logged on every limit change and every
+    REPORT_INTERVAL seconds, and summary() gives the average per host.
+    RateLimit headers reporting no remaining requests pause the host until
+    the reset. Slots are re-entrant per thread, so a streamed download can
+    hold its slot across both the request and the body transfer.
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+    # Longest pause honored from Retry-After or a rate-limit reset
+    MAX_PAUSE = 300.0
+    # Seconds of completed requests used for the reported rate
+    RATE_WINDOW = 10.0
+    # Seconds between rate reports for a host whose limit is not changing
+    REPORT_INTERVAL = 30.0
+
+    def __init__(self, per_host, min_per_host=1):
+        self.per_host = max(1, per_host)
+        self.min_per_host = max(1, min(min_per_host, self.per_host))
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._held = threading.local()
+
+    def _state(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = {
+                    "cond": threading.Condition(),
+                    "limit": float(self.per_host),
+                    "in_flight": 0,
+                    "paused_until": 0.0,
+                    "last_decrease": 0.0,
+                    "backoff": 0,
+                    "throttled": 0,
+                    "completed": deque(),
+                    "requests": 0,
+                    "first": None,
+                    "last": None,
+                    "reported": time.monotonic(),
+                }
+            return state
+
+    @contextmanager
+    def slot(self, url):
+        host = urlsplit(url).netloc
+        held = self._held.__dict__.setdefault("hosts", set())
+        if host in held:
+            yield
+            return
+        state = self._state(host)
+        with state["cond"]:
+            while True:
+                wait = state["paused_until"] - time.monotonic()
+                if wait <= 0 and state["in_flight"] < int(state["limit"]):
+                    break
+                state["cond"].wait(timeout=wait if wait > 0 else None)
+            state["in_flight"] += 1
+        held.add(host)
+        try:
+            yield
+        finally:
+            held.discard(host)
+            with state["cond"]:
+                state["in_flight"] -= 1
+                state["cond"].notify_all()
+
+    def wait(self, url):
+        """Sleep until url's host is no longer paused."""
+        state = self._state(urlsplit(url).netloc)
+        with state["cond"]:
+            while True:
+                wait = state["paused_until"] - time.monotonic()
+                if wait <= 0:
+                    return
+                state["cond"].wait(timeout=wait)
+
+    def feedback(self, url, resp, sent_at):
+        """
+        Adjust url's host after a response to a request sent at sent_at
+        (a time.monotonic() value). Returns True if the response was a throttle.
+        """
+        host = urlsplit(url).netloc
+        state = self._state(host)
+        now = time.monotonic()
+        throttled = resp.status_code in self.THROTTLE_STATUSES
+        with state["cond"]:
+            old = int(state["limit"])
+            if throttled:
+                state["throttled"] += 1
+                pause = _retry_after(resp.headers)
+                if pause is None:
+                    pause = float(2 ** min(state["backoff"], 6))
+                    state["backoff"] += 1
+                state["paused_until"] = max(
+                    state["paused_until"], now + min(pause, self.MAX_PAUSE)
+                )
+                # Requests sent before the last decrease saw the old limit
+                if sent_at >= state["last_decrease"]:
+                    state["limit"] = max(float(self.min_per_host), state["limit"] / 2)
+                    state["last_decrease"] = now
+            elif resp.status_code < 400:
+                state["backoff"] = 0
+                state["completed"].append(now)
+                state["requests"] += 1
+                if state["first"] is None:
+                    state["first"] = now
+                state["last"] = now
+                state["limit"] = min(
+                    float(self.per_host), state["limit"] + 1 / state["limit"]
+                )
+                reset = _rate_limit_reset(resp.headers)
+                if reset is not None:
+                    state["paused_until"] = max(
+                        state["paused_until"], now + min(reset, self.MAX_PAUSE)
+                    )
+            completed = state["completed"]
+            while completed and completed[0] < now - self.RATE_WINDOW:
+                completed.popleft()
+            new = int(state["limit"])
+            rate = len(completed) / self.RATE_WINDOW
+            report = new != old or now - state["reported"] >= self.REPORT_INTERVAL
+            if report:
+                state["reported"] = now
+            state["cond"].notify_all()
+        if throttled and new != old:
+            log(
+                f"--> {host} throttled ({resp.status_code}): concurrency {old} -> {new}, "
+                f"pausing {state['paused_until'] - now:.1f}s, {rate:.1f} req/s"
+            )
+        elif throttled:
+            log(f"--> {host} throttled ({resp.status_code}), pausing {state['paused_until'] - now:.1f}s")
+        elif new != old:
+            log(f"--> {host}: concurrency {old} -> {new}, {rate:.1f} req/s")
+        elif report:
+            log(f"--> {host}: {rate:.1f} req/s, concurrency {new}/{self.per_host}")
+        return throttled
+
+    def summary(self):
+        """One line per host with its request rate and throttling, or None if no host was used."""
+        lines = []
+        with self._lock:
+            hosts = sorted(self._hosts.items())
+        for host, state in hosts:
+            with state["cond"]:
+                if not state["requests"] and not state["throttled"]:
+                    continue
+                elapsed = (state["last"] or 0) - (state["first"] or 0)
+                rate = state["requests"] / elapsed if elapsed > 0 else 0.0
+                line = (
+                    f"{host}: {state['requests']} successful requests, {rate:.1f} req/s, "
+                    f"concurrency now {int(state['limit'])}/{self.per_host}"
+                )
+                if state["throttled"]:
+                    line += f", throttled {state['throttled']} times"
+                lines.append(line)
+        return "\n".join(lines) if lines else None
+
+
+def _retry_after(headers):
+    """Seconds to wait from a Retry-After header (delta or HTTP date), or None."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _rate_limit_reset(headers):
+    """Seconds until a rate-limit window resets if no requests remain in it, else None."""
+    for prefix in ("RateLimit-", "X-RateLimit-"):
+        remaining = headers.get(prefix + "Remaining")
+        if remaining is None:
+            continue
+        try:
+            if float(remaining) > 0:
+                return None
+            reset = float(headers.get(prefix + "Reset", 1))
+        except ValueError:
+            return None
+        # Some servers send an absolute Unix time rather than seconds
+        return max(0.0, reset - time.time()) if reset > 1e9 else reset
+    return None
+
+
+class ResponseCache:
+    """
+    Persistent on-disk cache of GET response bodies, keyed by URL.
+    Each entry is a `<key>.body` file plus a `<key>.json` sidecar holding the
+    ETag/Last-Modified validators. The body's mtime is the LRU timestamp and
+    the least recently used entries are evicted once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024, offline=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._sizes = {}
+        self._total = 0
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".body"):
+                key = name[: -len(".body")]
+                size = os.path.getsize(os.path.join(directory, name))
+                self._sizes[key] = size
+                self._total += size
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".body", base + ".json"
+
+    def lookup(self, url):
+        """Return (meta, body_path) for a cached URL, or None."""
+        key = self.key(url)
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(body_path):
+            return None
+        return meta, body_path
+
+    def conditional_headers(self, cached):
+        meta, _ = cached
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def to_response(self, url, cached, stream=False):
+        """
+        Build a 200 Response from a cache entry and mark it as recently used.
+        With stream=True the body is read lazily from the cache file.
+        """
+        meta, body_path = cached
+        try:
+            os.utime(body_path)
+        except OSError:
+            pass
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.reason = "OK"
+        resp.url = url
+        resp.headers = CaseInsensitiveDict(meta.get("headers", {}))
+        if stream:
+            resp.raw = open(body_path, "rb")
+        else:
+            with open(body_path, "rb") as f:
+                resp._content = f.read()
+            resp._content_consumed = True
+        resp.from_cache = True
+        return resp
+
+    def miss_response(self, url):
+        """Response returned for uncached URLs in offline mode."""
+        resp = requests.Response()
+        resp.status_code = 504
+        resp.reason = "Not in offline cache"
+        resp.url = url
+        resp._content = b""
+        resp._content_consumed = True
+        resp.from_cache = True
+        return resp
+
+    def store(self, url, resp):
+        """Cache a 200 response body together with its validators."""
+        body = resp.content
+
+        def write_body(f):
+            f.write(body)
+
+        self._store(url, resp.headers, write_body)
+
+    def store_file(self, url, headers, path):
+        """Cache a body that has already been streamed to `path`."""
+
+        def write_body(f):
+            with open(path, "rb") as src:
+                shutil.copyfileobj(src, f, DOWNLOAD_CHUNK_SIZE)
+
+        self._store(url, headers, write_body)
 
+    def _store(self, url, headers, write_body):
+        key = self.key(url)
+        body_path, meta_path = self._paths(key)
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "headers": {
+                k: v
+                for k, v in headers.items()
+                if k.lower() in ("content-type", "etag", "last-modified")
+            },
+            "stored_at": time.time(),
+        }
+        suffix = f".{threading.get_ident()}.tmp"
+        with open(body_path + suffix, "wb") as f:
+            write_body(f)
+        os.replace(body_path + suffix, body_path)
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + suffix, meta_path)
+        size = os.path.getsize(body_path)
 
-def make_session():
-    s = requests.Session()
-    retries = Retry(
-        total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504]
+        with self._lock:
+            self._total += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            if self._total > self.max_bytes:
+                self._evict(keep=key)
+
+    def _evict(self, keep):
+        """Drop least recently used entries until the cache fits max_bytes."""
+        by_age = []
+        for key in self._sizes:
+            if key == keep:
+                continue
+            try:
+                mtime = os.path.getmtime(self._paths(key)[0])
+            except OSError:
+                mtime = 0
+            by_age.append((mtime, key))
+        by_age.sort()
+        for _, key in by_age:
+            if self._total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total -= self._sizes.pop(key)
+
+
+class FetcherSession(requests.Session):
+    """
+    requests.Session that routes every request through a HostLimiter and,
+    for GETs, an optional ResponseCache with conditional revalidation.
+    Requests made with a `stage` label are recorded in `metrics`; streamed
+    ones are recorded by download_file once the body has been transferred.
+    `api_base` is the PokeAPI root the list endpoint is read from.
+    """
+
+    def __init__(self, host_limiter=None, cache=None, metrics=None, api_base=API_BASE):
+        super().__init__()
+        self.api_base = api_base.rstrip("/")
+        self.host_limiter = host_limiter
+        self.cache = cache
+        self.metrics = metrics
+
+    # Throttled (429/503) responses are retried here rather than by urllib3,
+    # so the wait is shared by every request to the host
+    throttle_retries = 5
+
+    def _send(self, method, url, *args, **kwargs):
+        if self.host_limiter is None:
+            return super().request(method, url, *args, **kwargs)
+        for attempt in range(self.throttle_retries + 1):
+            with self.host_limiter.slot(url):
+                sent_at = time.monotonic()
+                resp = super().request(method, url, *args, **kwargs)
+                throttled = self.host_limiter.feedback(url, resp, sent_at)
+            if not throttled or attempt == self.throttle_retries:
+                break
+            resp.close()
+            self.host_limiter.wait(url)
+        resp.throttle_retries = attempt
+        return resp
+
+    def request(self, method, url, *args, stage=None, **kwargs):
+        started = time.perf_counter()
+        resp = self._cached_request(method, url, *args, **kwargs)
+        if stage and self.metrics is not None and not kwargs.get("stream"):
+            self.metrics.observe_response(stage, time.perf_counter() - started, resp)
+        return resp
+
+    def _cached_request(self, method, url, *args, **kwargs):
+        if self.cache is None or method.upper() != "GET":
+            return self._send(method, url, *args, **kwargs)
+
+        stream = kwargs.get("stream", False)
+        cached = self.cache.lookup(url)
+        if self.cache.offline:
+            if cached:
+                return self.cache.to_response(url, cached, stream=stream)
+            return self.cache.miss_response(url)
+
+        if cached:
+            headers = dict(kwargs.pop("headers", None) or {})
+            headers.update(self.cache.conditional_headers(cached))
+            kwargs["headers"] = headers
+        resp = self._send(method, url, *args, **kwargs)
+        if resp.status_code == 304 and cached:
+            resp.close()
+            return self.cache.to_response(url, cached, stream=stream)
+        # Streamed bodies are cached by download_file once fully written
+        if resp.status_code == 200 and not stream:
+            self.cache.store(url, resp)
+        return resp
+
+
+def make_session(workers=1, per_host=None, cache=None, metrics=None, api_base=API_BASE):
+    """
+    Create the shared HTTP session.
+    The connection pool is sized for `workers` threads and each host is
+    limited to at most `per_host` concurrent requests (defaults to
+    `workers`), fewer while the host is throttling us.
+    GET responses go through `cache` (a ResponseCache) when given, and
+    labelled requests are recorded in `metrics` (a FetchMetrics).
+    """
+    s = FetcherSession(
+        HostLimiter(per_host or workers), cache=cache, metrics=metrics, api_base=api_base
+    )
+    # 429 and 503 are handled by the adaptive HostLimiter in FetcherSession
+    retries = Retry(total=5, backoff_factor=1, status_forcelist=[500, 502, 504])
+    pool_size = max(10, workers)
+    adapter = HTTPAdapter(
+        max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size
     )
-    adapter = HTTPAdapter(max_retries=retries)
     s.mount("https://", adapter)
     s.mount("http://", adapter)
     s.headers.update({"User-Agent": "pokedex-data-fetcher/1.0"})
     return s
 
 
-def compress_gif(gif_path):
+# Default GIF byte budget. The receiver needs the whole GIF plus a 50KB
+# reserve in free heap, so anything above this may fail to load on device.
+GIF_BUDGET = 100 * 1024
+# Smallest height the optimizer will pick before degrading other settings
+GIF_MIN_HEIGHT = 40
+# Absolute floor for the last-resort tier
+GIF_FLOOR_HEIGHT = 16
+# Settings tiers, best quality first: (palette colors, lossy level, keep every Nth frame)
+GIF_QUALITY_TIERS = [
+    (256, 0, 1),
+    (128, 30, 1),
+    (64, 60, 1),
+    (64, 80, 2),
+    (32, 120, 2),
+]
+
+
+def needs_compression(gif_path, budget=GIF_BUDGET):
+    try:
+        return os.path.getsize(gif_path) > budget
+    except OSError:
+        return False
+
+
+class _GifsicleEncoder:
+    name = "gifsicle"
+
+    def __init__(self, src_path):
+        self.src_path = src_path
+        info = subprocess.run(
+            ["gifsicle", "--info", src_path], capture_output=True, text=True
+        ).stdout
+        screen = re.search(r"logical screen (\d+)x(\d+)", info)
+        if not screen:
+            raise RuntimeError(f"gifsicle could not read {src_path}")
+        self.height = int(screen.group(2))
+        images = re.search(r"(\d+) images?", info)
+        self.n_frames = int(images.group(1)) if images else 1
+        delays = [float(d) for d in re.findall(r"delay ([\d.]+)s", info)]
+        self.delay_cs = round(100 * sum(delays) / len(delays)) if delays else 10
+        self.supports_lossy = True
+
+    def encode(self, dst_path, height, colors, lossy, step):
+        command = ["gifsicle", "-O2", "--resize-height", str(height)]
+        if colors < 256:
+            command += ["--colors", str(colors)]
+        if lossy and self.supports_lossy:
+            command.append(f"--lossy={lossy}")
+        frames = []
+        if step > 1 and self.n_frames > 1:
+            command += ["-U", "--delay", str(self.delay_cs * step)]
+            frames = [f"#{i}" for i in range(0, self.n_frames, step)]
+        command += ["-o", dst_path, self.src_path] + frames
+
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0 and lossy and self.supports_lossy:
+            # gifsicle before 1.92 has no --lossy
+            self.supports_lossy = False
+            return self.encode(dst_path, height, colors, lossy, step)
+        if result.returncode != 0:
+            raise RuntimeError(f"gifsicle failed for {self.src_path}: {result.stderr}")
+        return os.path.getsize(dst_path)
+
+
+class _PillowEncoder:
+    """Fallback encoder for when gifsicle is not installed. Has no lossy mode."""
+
+    name = "Pillow"
+    supports_lossy = False
+
+    def __init__(self, src_path):
+        from PIL import Image, ImageSequence
+
+        self._Image = Image
+        with Image.open(src_path) as im:
+            self.loop = im.info.get("loop", 0)
+            self.frames = []
+            self.durations = []
+            for frame in ImageSequence.Iterator(im):
+                self.durations.append(
+                    frame.info.get("duration", im.info.get("duration", 100))
+                )
+                self.frames.append(frame.convert("RGBA"))
+        self.height = self.frames[0].height
+        self.n_frames = len(self.frames)
+
+    def _quantize(self, frame, colors):
+        # Reserve the last palette entry for transparent pixels
+        Image = self._Image
+        transparent = frame.getchannel("A").point(lambda a: 255 if a < 128 else 0)
+        paletted = frame.convert("RGB").quantize(
+            colors=colors - 1, method=Image.Quantize.FASTOCTREE
+        )
+        palette = paletted.getpalette()[: 3 * (colors - 1)]
+        palette += [0] * (3 * (colors - 1) - len(palette))
+        paletted.putpalette(palette + [0, 0, 0])
+        paletted.paste(colors - 1, mask=transparent)
+        return paletted
+
+    def encode(self, dst_path, height, colors, lossy, step):
+        frames = []
+        durations = []
+        for i in range(0, self.n_frames, step):
+            rgba = self.frames[i]
+            width = max(1, round(rgba.width * height / rgba.height))
+            resized = rgba.resize((width, height), self._Image.Resampling.LANCZOS)
+            frames.append(self._quantize(resized, colors))
+            # Dropped frames hand their display time to the frame kept before them
+            durations.append(sum(self.durations[i : i + step]))
+        frames[0].save(
+            dst_path,
+            "GIF",
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            loop=self.loop,
+            disposal=2,
+            transparency=colors - 1,
+            optimize=True,
+        )
+        return os.path.getsize(dst_path)
+
+
+def optimize_gif(
+    gif_path, budget=GIF_BUDGET, min_height=GIF_MIN_HEIGHT, max_passes=10
+):
     """
-    Compresses a GIF using gifsicle if it's over 110KB.
-    Recursively compresses with smaller sizes if still over 100KB.
-    Overwrites the original file.
+    Re-encode gif_path to the highest quality that fits in `budget` bytes.
+
+    Quality tiers (palette size, lossy level, frame dropping) are tried best
+    first. Within a tier the largest height that fits is searched for with a
+    size model (bytes grow with height squared) fitted to every encode, with
+    each guess kept inside the remaining bisection interval so the search
+    always converges. A tier is accepted if it fits at `min_height` or
+    taller; the last tier may go down to GIF_FLOOR_HEIGHT. The original is
+    replaced atomically. Returns a report dict with sizes and pass count.
     """
-    if not shutil.which("gifsicle"):
-        print("--> gifsicle not found, skipping compression.")
-        return
+    original_size = os.path.getsize(gif_path)
+    report = {
+        "path": gif_path,
+        "original_size": original_size,
+        "size": original_size,
+        "passes": 0,
+        "backend": None,
+        "height": None,
+        "colors": None,
+        "lossy": 0,
+        "frame_step": 1,
+        "within_budget": original_size <= budget,
+    }
+    if original_size <= budget:
+        return report
+
+    if shutil.which("gifsicle"):
+        encoder = _GifsicleEncoder(gif_path)
+    else:
+        encoder = _PillowEncoder(gif_path)
+    report["backend"] = encoder.name
+    full_height = encoder.height
+
+    tiers = []
+    for colors, lossy, step in GIF_QUALITY_TIERS:
+        setting = (colors, lossy if encoder.supports_lossy else 0, step)
+        if setting not in tiers:
+            tiers.append(setting)
+
+    attempt_path = gif_path + ".attempt"
+    best_path = gif_path + ".best"
+    best = None
+    smallest = None
+    # Bytes per squared pixel of height, seeded from the original file
+    k = original_size / full_height**2
+    tolerance = max(1, full_height // 25)
 
     try:
-        file_size = os.path.getsize(gif_path)
-        if file_size > 110 * 1024:
-            print(f"--> GIF is {(file_size / 1024):.1f}KB, compressing...")
-
-            # Try different heights: 50, then 40 if still over 100KB
-            heights = [50, 40]
-
-            for height in heights:
-                command = [
-                    "gifsicle",
-                    "--resize-height",
-                    str(height),
-                    "-o",
-                    gif_path,  # gifsicle can overwrite with -o
-                    gif_path,
-                ]
-
-                result = subprocess.run(command, capture_output=True, text=True)
-
-                if result.returncode == 0:
-                    compressed_size = os.path.getsize(gif_path)
-                    print(
-                        f"--> Successfully compressed to {(compressed_size / 1024):.1f}KB (height: {height}px)."
-                    )
+        for tier_index, setting in enumerate(tiers):
+            last_tier = tier_index == len(tiers) - 1
+            floor = min(full_height, GIF_FLOOR_HEIGHT if last_tier else min_height)
+            lo, hi = None, full_height + 1
+            while report["passes"] < max_passes:
+                lower = lo + 1 if lo is not None else floor
+                upper = hi - 1
+                if lower > upper:
+                    break
+                guess = int(math.sqrt(0.97 * budget / k))
+                if lo is not None and hi <= full_height:
+                    quarter = (hi - lo) // 4
+                    lower, upper = lo + max(1, quarter), hi - max(1, quarter)
+                guess = min(max(guess, lower), upper)
 
-                    # If under 100KB, we're done
-                    if compressed_size <= 100 * 1024:
-                        break
-                    # If this was the last attempt, we're done regardless
-                    elif height == heights[-1]:
-                        break
-                    else:
-                        print(f"--> Still over 100KB, trying smaller size...")
+                size = encoder.encode(attempt_path, guess, *setting)
+                report["passes"] += 1
+                k = size / guess**2
+                if size <= budget:
+                    lo = guess
+                    best = (guess, setting, size)
+                    os.replace(attempt_path, best_path)
                 else:
-                    print(f"--> gifsicle failed for {gif_path}: {result.stderr}")
+                    hi = guess
+                    if smallest is None or size < smallest[2]:
+                        smallest = (guess, setting, size)
+                        os.replace(attempt_path, gif_path + ".smallest")
+                    if guess == floor:
+                        break
+                if lo is not None and hi - lo <= tolerance:
                     break
+            if best is not None or report["passes"] >= max_passes:
+                break
+
+        if best is not None:
+            chosen, chosen_path = best, best_path
+        elif smallest is not None and smallest[2] < original_size:
+            chosen, chosen_path = smallest, gif_path + ".smallest"
         else:
-            pass
+            return report
+        os.replace(chosen_path, gif_path)
+        height, (colors, lossy, step), size = chosen
+        report.update(
+            size=size,
+            height=height,
+            colors=colors,
+            lossy=lossy,
+            frame_step=step,
+            within_budget=size <= budget,
+        )
+        return report
+    finally:
+        for path in (attempt_path, best_path, gif_path + ".smallest"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def compress_gif(gif_path, budget=GIF_BUDGET, min_height=GIF_MIN_HEIGHT):
+    """
+    Compresses a GIF that is over `budget` bytes with optimize_gif, using
+    gifsicle or Pillow when gifsicle is not installed. Overwrites the
+    original file. Returns the optimizer report, or None on error.
+    """
+    try:
+        file_size = os.path.getsize(gif_path)
+        if file_size <= budget:
+            return None
+        log(
+            f"--> GIF is {(file_size / 1024):.1f}KB, optimizing for a {(budget / 1024):.0f}KB budget..."
+        )
+        started = time.perf_counter()
+        report = optimize_gif(gif_path, budget=budget, min_height=min_height)
+        report["seconds"] = time.perf_counter() - started
+        settings = (
+            f"height: {report['height']}px, colors: {report['colors']}, "
+            f"lossy: {report['lossy']}, frame step: {report['frame_step']}, "
+            f"{report['backend']}"
+        )
+        if report["within_budget"]:
+            log(
+                f"--> Successfully compressed to {(report['size'] / 1024):.1f}KB "
+                f"in {report['passes']} passes ({settings})."
+            )
+        else:
+            log(
+                f"--> Still over budget at {(report['size'] / 1024):.1f}KB "
+                f"after {report['passes']} passes ({settings})."
+            )
+        return report
 
     except FileNotFoundError:
-        print(f"--> Error: GIF file not found at {gif_path} for compression.")
+        log(f"--> Error: GIF file not found at {gif_path} for compression.")
+    except ImportError:
+        log("--> gifsicle and Pillow not found, skipping compression.")
     except Exception as e:
-        print(f"--> An error occurred during compression: {e}")
+        log(f"--> An error occurred during compression: {e}")
+    return None
+
+
+def _compress_gif_job(gif_path, budget, min_height):
+    """Process pool entry point: compress and return (log lines, report)."""
+    _log_state.buffer = []
+    try:
+        report = compress_gif(gif_path, budget=budget, min_height=min_height)
+    finally:
+        lines = _log_state.buffer
+        _log_state.buffer = None
+    return lines, report
+
+
+class GifCompressor:
+    """
+    Separate pipeline stage for GIF compression.
+    Downloads submit finished GIFs and return immediately; those over the
+    byte budget are optimized on a process pool sized to the core count, so
+    network and CPU work overlap. With workers=0, or if no pool can be
+    started, GIFs are compressed in-process instead.
+    """
+
+    def __init__(
+        self, workers=None, budget=GIF_BUDGET, min_height=GIF_MIN_HEIGHT, metrics=None
+    ):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.budget = budget
+        self.min_height = min_height
+        self.metrics = metrics
+        self.reports = []
+        # gif_path -> Future resolved with the outcome once _finished is done
+        self._futures = {}
+        self._outcomes = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        if self.workers > 0:
+            try:
+                # spawn, because forking a process with live download threads is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (OSError, NotImplementedError, ImportError) as e:
+                log(f"--> Process pool unavailable ({e}), compressing in-process.")
+
+    def submit(self, gif_path):
+        """Queue gif_path for compression if it is over the byte budget."""
+        with self._lock:
+            self._outcomes.pop(gif_path, None)
+        if not needs_compression(gif_path, self.budget):
+            return
+        if self._pool is None:
+            report = compress_gif(gif_path, self.budget, self.min_height)
+            self._record(report)
+            with self._lock:
+                self._outcomes[gif_path] = self._outcome(gif_path, report)
+            return
+        done = Future()
+        with self._lock:
+            self._futures[gif_path] = done
+        try:
+            future = self._pool.submit(
+                _compress_gif_job, gif_path, self.budget, self.min_height
+            )
+        except BaseException:
+            with self._lock:
+                del self._futures[gif_path]
+            raise
+        future.add_done_callback(lambda f: self._finished(gif_path, f, done))
+
+    def _record(self, report):
+        if report is not None:
+            with self._lock:
+                self.reports.append(report)
+            if self.metrics is not None:
+                self.metrics.observe_compression(report)
+
+    def _outcome(self, gif_path, report):
+        """
+        The report, or an exception if the GIF could not be compressed or is
+        still over the budget (the receiver may fail to load it).
+        """
+        # compress_gif logs and swallows its errors, leaving the GIF as it was
+        if report is None and needs_compression(gif_path, self.budget):
+            return RuntimeError(f"compression of {gif_path} failed")
+        if report is not None and not report["within_budget"]:
+            return RuntimeError(
+                f"{gif_path} is still {report['size'] / 1024:.1f}KB, "
+                f"over the {self.budget / 1024:.0f}KB budget"
+            )
+        return report
+
+    def _finished(self, gif_path, future, done):
+        try:
+            lines, report = future.result()
+            self._record(report)
+            outcome = self._outcome(gif_path, report)
+        except Exception as e:
+            lines = [f"--> Compression of {gif_path} failed: {e}"]
+            outcome = e
+        with self._lock:
+            self._outcomes[gif_path] = outcome
+            if self._futures.get(gif_path) is done:
+                del self._futures[gif_path]
+        if lines:
+            with _print_lock:
+                print("\n".join(lines), flush=True)
+        # Last, so callbacks never see the pool future done without its outcome
+        done.set_result(outcome)
+
+    def then(self, gif_path, callback):
+        """
+        Run callback(outcome) once gif_path is no longer queued for
+        compression. outcome is the optimizer report, an exception if the
+        compression failed or left the GIF over budget, or None if the GIF
+        never needed compressing.
+        """
+        with self._lock:
+            done = self._futures.get(gif_path)
+            outcome = self._outcomes.get(gif_path)
+        if done is None:
+            callback(outcome)
+        else:
+            done.add_done_callback(lambda f: callback(f.result()))
+
+    def close(self):
+        """Wait for all queued compressions to finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    def summary(self):
+        """One-line summary of all optimizer reports, or None if none ran."""
+        if not self.reports:
+            return None
+        before = sum(r["original_size"] for r in self.reports)
+        after = sum(r["size"] for r in self.reports)
+        passes = sum(r["passes"] for r in self.reports)
+        over = [r["path"] for r in self.reports if not r["within_budget"]]
+        line = (
+            f"GIF compression: {len(self.reports)} files, "
+            f"{(before / 1024):.0f}KB -> {(after / 1024):.0f}KB, "
+            f"{passes / len(self.reports):.1f} passes per file"
+        )
+        if over:
+            line += f", {len(over)} still over budget: {', '.join(over)}"
+        return line
 
 
 def extract_pokemon_info(data, species_data=None):
@@ -142,91 +1007,652 @@ def find_sprite_urls(data):
     return png, gif
 
 
+def write_json_atomic(path, obj):
+    """Write obj as pretty-printed JSON to path via a temp file and rename."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".part"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=4)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def download_file(
+    session, url, dest_path, chunk_size=DOWNLOAD_CHUNK_SIZE, stage=None
+):
+    """
+    Stream url to dest_path in fixed-size chunks.
+    The body goes to a temp file next to dest_path and is only renamed into
+    place once its length matches Content-Length, so an interrupted download
+    never leaves a truncated file behind. Returns the number of bytes
+    written, or None if the server did not answer with 200.
+    """
+    limiter = getattr(session, "host_limiter", None)
+    with limiter.slot(url) if limiter else nullcontext():
+        return _stream_to_file(session, url, dest_path, chunk_size, stage)
+
+
+def _stream_to_file(session, url, dest_path, chunk_size, stage):
+    started = time.perf_counter()
+    written = 0
+    resp = session.get(url, stream=True)
+    try:
+        if resp.status_code != 200:
+            return None
+
+        expected = None
+        # Content-Length counts encoded bytes, iter_content yields decoded ones
+        if "Content-Length" in resp.headers and not resp.headers.get(
+            "Content-Encoding"
+        ):
+            expected = int(resp.headers["Content-Length"])
+
+        directory = os.path.dirname(dest_path) or "."
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(dest_path)}.", suffix=".part"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in resp.iter_content(chunk_size):
+                    f.write(chunk)
+                    written += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            if written == 0 or (expected is not None and written != expected):
+                raise IOError(
+                    f"incomplete download of {url}: got {written} bytes, "
+                    f"expected {expected if expected is not None else 'more than 0'}"
+                )
+            cache = getattr(session, "cache", None)
+            if cache is not None and not getattr(resp, "from_cache", False):
+                cache.store_file(url, resp.headers, tmp_path)
+            os.chmod(tmp_path, FILE_MODE)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return written
+    finally:
+        resp.close()
+        metrics = getattr(session, "metrics", None)
+        if stage and metrics is not None:
+            metrics.observe_response(
+                stage, time.perf_counter() - started, resp, nbytes=written
+            )
+
+
+def pokemon_id_from_url(url):
+    """Return the numeric ID from a `.../pokemon/{id}/` URL, or None."""
+    match = re.search(r"/pokemon/(\d+)/?$", url or "")
+    return int(match.group(1)) if match else None
+
+
+class SyncJournal:
+    """
+    Append-only record of how far each entry got, in the output directory.
+    Every line of `.sync_journal.jsonl` is one event: an entry reaching a
+    state in STATES (the "json" event also carries the sprite URLs, so a
+    resumed entry needs no API requests) or failing at a stage. Lines are
+    flushed as they are written, so a killed run loses at most the line it
+    was writing; a torn last line is ignored on load. The journal is
+    rewritten compactly at startup once it is mostly superseded events.
+    """
+
+    FILENAME = ".sync_journal.jsonl"
+    # Written by versions that only recorded completed IDs
+    LEGACY_MANIFEST = ".sync_manifest.json"
+    STATES = ["json", "png", "gif", "compressed"]
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, self.FILENAME)
+        self._lock = threading.Lock()
+        self._entries = {}
+        events = 0
+        torn = False
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        torn = True
+                        continue
+                    self._apply(event)
+                    events += 1
+            # Appending after a torn line would corrupt the next event too
+            if torn or events > 2 * len(self._entries) + 100:
+                self._rewrite()
+        else:
+            self._seed(directory)
+            self._rewrite()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _seed(self, directory):
+        legacy_path = os.path.join(directory, self.LEGACY_MANIFEST)
+        if os.path.exists(legacy_path):
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                ids = json.load(f).get("completed", [])
+            for pokemon_id in ids:
+                self._apply({"id": pokemon_id, "state": self._seed_state(directory, pokemon_id)})
+        else:
+            ids = [
+                int(name[: -len(".json")])
+                for name in os.listdir(directory)
+                if name.endswith(".json") and name[: -len(".json")].isdigit()
+            ]
+            for pokemon_id in ids:
+                self._apply({"id": pokemon_id, "state": self._seed_state(directory, pokemon_id)})
+
+    def _seed_state(self, directory, pokemon_id):
+        """
+        State of an entry written before the journal existed. Neither the old
+        manifest nor a JSON file is proof its sprites were written, so only
+        an entry with both its PNG and GIF on disk counts as complete; any
+        other one is at "json" without sprite URLs and is fetched again
+        (once, for the few entries that have no GIF at all).
+        """
+        for ext in ("png", "gif"):
+            if not os.path.exists(os.path.join(directory, f"{pokemon_id}.{ext}")):
+                return "json"
+        return self.STATES[-1]
+
+    def _rewrite(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for pokemon_id in sorted(self._entries):
+                f.write(json.dumps(self._entries[pokemon_id]) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _apply(self, event):
+        entry = self._entries.setdefault(event["id"], {"id": event["id"]})
+        if event.get("state"):
+            entry["state"] = event["state"]
+            entry.pop("error", None)
+            entry.pop("stage", None)
+        if event.get("error"):
+            entry["error"] = event["error"]
+            entry["stage"] = event.get("stage")
+        for key in ("url", "png_url", "gif_url"):
+            if key in event:
+                entry[key] = event[key]
+
+    def _write(self, event):
+        with self._lock:
+            self._apply(event)
+            self._file.write(json.dumps(event) + "\n")
+            self._file.flush()
+
+    def record(self, pokemon_id, state, **fields):
+        """Note that pokemon_id reached state; fields are kept with the entry."""
+        self._write({"id": pokemon_id, "state": state, **fields})
+
+    def fail(self, pokemon_id, stage, error, url=None):
+        """Put pokemon_id in the retry queue, keeping the state it last reached."""
+        event = {"id": pokemon_id, "stage": stage, "error": str(error) or stage}
+        if url:
+            event["url"] = url
+        self._write(event)
+
+    def get(self, pokemon_id):
+        with self._lock:
+            entry = self._entries.get(pokemon_id)
+            return dict(entry) if entry else None
+
+    def is_complete(self, pokemon_id):
+        entry = self.get(pokemon_id)
+        return bool(entry) and "error" not in entry and self.reached(entry, self.STATES[-1])
+
+    @classmethod
+    def reached(cls, entry, state):
+        """Whether a journal entry (as returned by get) got to state."""
+        current = (entry or {}).get("state")
+        return current in cls.STATES and cls.STATES.index(current) >= cls.STATES.index(state)
+
+    def failed(self):
+        """Entries in the retry queue, by ID."""
+        with self._lock:
+            return [
+                dict(entry)
+                for _, entry in sorted(self._entries.items())
+                if "error" in entry
+            ]
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class SpeciesStore:
+    """
+    Bounded, thread-safe store of species data shared by all forms.
+    Alternate forms point at the same species URL; concurrent requests for a
+    species already being fetched wait for that fetch instead of issuing
+    their own. Only the fields extract_pokemon_info reads are kept.
+    """
+
+    def __init__(self, session, max_entries=2048):
+        self.session = session
+        self.max_entries = max_entries
+        self.fetched = 0
+        self.reused = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, species_url):
+        with self._lock:
+            if species_url in self._entries:
+                self._entries.move_to_end(species_url)
+                self.reused += 1
+                return self._entries[species_url]
+            future = self._inflight.get(species_url)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[species_url] = future
+            else:
+                self.reused += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            data = self._fetch(species_url)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[species_url]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[species_url]
+            self.fetched += 1
+            if data is not None:
+                self._entries[species_url] = data
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(data)
+        return data
+
+    def _fetch(self, species_url):
+        resp = self.session.get(species_url, stage="species")
+        if resp.status_code != 200:
+            return None
+        return {"names": resp.json().get("names", [])}
+
+
+class SpriteStore:
+    """
+    Content-addressed store for sprites shared between entries.
+    Each distinct sprite is kept once in `.objects/` in the output directory, named by
+    the SHA-256 of its body as downloaded (GIFs are stored after compression),
+    and `{id}.png`/`{id}.gif` are hardlinks to it, or copies where the
+    filesystem has no hardlinks. `.sprite_index.json` maps sprite URLs to
+    those hashes, so a known URL costs no request and a known body costs no
+    compression pass. GIFs are only stored once they fit the budget, so a
+    failed compression is retried by the next run instead of being reused.
+    """
+
+    INDEX = ".sprite_index.json"
+    OBJECTS = ".objects"
+
+    def __init__(self, directory, save_every=50):
+        self.index_path = os.path.join(directory, self.INDEX)
+        self.objects_dir = os.path.join(directory, self.OBJECTS)
+        self.save_every = save_every
+        self.reused = 0
+        # Bytes of sprites served from a known URL, without any request
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._urls = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self._urls = json.load(f).get("urls", {})
+
+    def _object_path(self, digest, url):
+        ext = os.path.splitext(urlsplit(url).path)[1] or ".bin"
+        return os.path.join(self.objects_dir, digest[:2], digest + ext)
+
+    def _link(self, object_path, dest_path):
+        directory = os.path.dirname(dest_path) or "."
+        tmp_path = os.path.join(
+            directory, f".{os.path.basename(dest_path)}.{threading.get_ident()}.link"
+        )
+        try:
+            os.link(object_path, tmp_path)
+        except OSError:
+            shutil.copyfile(object_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+
+    def _reuse(self, digest, url, dest_path):
+        object_path = self._object_path(digest, url)
+        if not os.path.exists(object_path):
+            return False
+        if not (
+            os.path.exists(dest_path) and os.path.samefile(object_path, dest_path)
+        ):
+            self._link(object_path, dest_path)
+        with self._lock:
+            self.reused += 1
+        return True
+
+    def link_url(self, url, dest_path):
+        """Point dest_path at the stored sprite for url. Returns False if there is none."""
+        with self._lock:
+            digest = self._urls.get(url)
+        if digest is None or not self._reuse(digest, url, dest_path):
+            return False
+        with self._lock:
+            self.bytes_saved += os.path.getsize(dest_path)
+        return True
+
+    def link_body(self, url, path):
+        """
+        Record the hash of the sprite just downloaded from url to path, and
+        replace path with the stored copy if that body was seen before.
+        Returns True if it was, in which case path needs no compression.
+        """
+        digest = _file_sha256(path)
+        with self._lock:
+            self._urls[url] = digest
+            self._mark_unsaved_locked()
+        return self._reuse(digest, url, path)
+
+    def add(self, url, path):
+        """Store the final sprite at path (downloaded from url, see link_body)."""
+        with self._lock:
+            digest = self._urls.get(url)
+        if digest is None or not os.path.exists(path):
+            return
+        object_path = self._object_path(digest, url)
+        if os.path.exists(object_path):
+            return
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        try:
+            os.link(path, object_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            tmp_path = f"{object_path}.{threading.get_ident()}.part"
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, object_path)
+
+    def _mark_unsaved_locked(self):
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self._save_locked()
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"urls": self._urls}, f)
+        os.replace(tmp_path, self.index_path)
+        self._unsaved = 0
+
+    def summary(self):
+        """One-line summary of reused sprites, or None if none were."""
+        if not self.reused:
+            return None
+        return (
+            f"Sprite dedup: {self.reused} sprites reused, "
+            f"{self.bytes_saved / 1024 / 1024:.1f}MB not downloaded again"
+        )
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fetch_sprite(session, url, dest_path, stage, sprites=None):
+    """
+    Put the sprite at url into dest_path, reusing an identical stored one
+    from sprites (a SpriteStore) when possible. Returns "reused" if
+    dest_path now holds a final sprite, "downloaded" if it still has to be
+    compressed and passed to sprites.add, or None if the download failed.
+    """
+    if sprites is not None and sprites.link_url(url, dest_path):
+        return "reused"
+    if download_file(session, url, dest_path, stage=stage) is None:
+        return None
+    if sprites is not None and sprites.link_body(url, dest_path):
+        return "reused"
+    return "downloaded"
+
+
 def fetch_pokemon_entry(session, url):
-    resp = session.get(url)
+    resp = session.get(url, stage="entry")
     if resp.status_code != 200:
         return None
     return resp.json()
 
 
-def fetch_pokemon_data(session, pokemon_url, skip_existing=True):
-    data = fetch_pokemon_entry(session, pokemon_url)
-    if not data:
-        print(f"Failed to fetch data for url {pokemon_url}")
-        return None
+def fetch_pokemon_data(
+    session,
+    pokemon_url,
+    skip_existing=True,
+    species_store=None,
+    compressor=None,
+    journal=None,
+    resume=None,
+    sprites=None,
+    directory=POKEMON_DIR,
+):
+    """
+    Fetch one entry and write its JSON, PNG and GIF to directory.
+    With a journal, each finished step is recorded and a failed sprite
+    download puts the entry in the retry queue. resume is the entry's
+    journal record from an earlier run; steps it already reached are skipped.
+    Sprites already in sprites (a SpriteStore) are linked instead of fetched.
+    Returns the extracted info, or None if the entry was skipped or failed.
+    """
+    pokemon_id = resume.get("id") if resume else None
+    json_path = os.path.join(directory, f"{pokemon_id}.json")
+    # Seeded entries have no sprite URLs, so they start over from the API
+    if (
+        SyncJournal.reached(resume, "json")
+        and "png_url" in resume
+        and os.path.exists(json_path)
+    ):
+        with open(json_path, "r", encoding="utf-8") as f:
+            pokemon_info = json.load(f)
+        png_url, gif_url = resume.get("png_url"), resume.get("gif_url")
+        log(f"Resuming {pokemon_id} ({pokemon_info.get('name')}) after {resume['state']}")
+    else:
+        resume = None
+        data = fetch_pokemon_entry(session, pokemon_url)
+        if not data:
+            log(f"Failed to fetch data for url {pokemon_url}")
+            if journal is not None and pokemon_id_from_url(pokemon_url):
+                journal.fail(
+                    pokemon_id_from_url(pokemon_url), "entry", "no data", url=pokemon_url
+                )
+            return None
 
-    pokemon_id = data.get("id")
-    if not pokemon_id:
-        print(f"No id for {pokemon_url}")
-        return None
+        pokemon_id = data.get("id")
+        if not pokemon_id:
+            log(f"No id for {pokemon_url}")
+            return None
 
-    json_path = os.path.join(POKEMON_DIR, f"{pokemon_id}.json")
-    png_path = os.path.join(POKEMON_DIR, f"{pokemon_id}.png")
-    gif_path = os.path.join(POKEMON_DIR, f"{pokemon_id}.gif")
+        json_path = os.path.join(directory, f"{pokemon_id}.json")
+        if skip_existing and os.path.exists(json_path):
+            log(f"Skipping existing {pokemon_id}")
+            return None
 
-    if skip_existing and os.path.exists(json_path):
-        print(f"Skipping existing {pokemon_id}")
-        return None
+        # Fetch species data for names
+        species_url = data.get("species", {}).get("url")
+        species_data = None
+        if species_url and species_store is not None:
+            species_data = species_store.get(species_url)
+        elif species_url:
+            sresp = session.get(species_url, stage="species")
+            if sresp.status_code == 200:
+                species_data = sresp.json()
 
-    # Fetch species data for names
-    species_url = data.get("species", {}).get("url")
-    species_data = None
-    if species_url:
-        sresp = session.get(species_url)
-        if sresp.status_code == 200:
-            species_data = sresp.json()
+        pokemon_info = extract_pokemon_info(data, species_data)
 
-    pokemon_info = extract_pokemon_info(data, species_data)
+        # Save JSON
+        write_json_atomic(json_path, pokemon_info)
 
-    # Save JSON
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(pokemon_info, f, ensure_ascii=False, indent=4)
+        png_url, gif_url = find_sprite_urls(data)
+        if journal is not None:
+            journal.record(
+                pokemon_id, "json", url=pokemon_url, png_url=png_url, gif_url=gif_url
+            )
 
-    png_url, gif_url = find_sprite_urls(data)
+    png_path = os.path.join(directory, f"{pokemon_id}.png")
+    gif_path = os.path.join(directory, f"{pokemon_id}.gif")
+    failed = None
 
-    if png_url:
-        presp = session.get(png_url)
-        if presp.status_code == 200:
-            with open(png_path, "wb") as f:
-                f.write(presp.content)
-        else:
-            print(
+    png_done = SyncJournal.reached(resume, "png") and (
+        not png_url or os.path.exists(png_path)
+    )
+    png_status = None
+    if png_url and not png_done:
+        png_status = fetch_sprite(session, png_url, png_path, "png", sprites)
+        if png_status is None:
+            log(
                 f"Failed to download PNG for {pokemon_id} ({pokemon_info.get('name')}) - URL: {png_url}"
             )
+            failed = ("png", f"PNG download failed: {png_url}")
+        elif png_status == "downloaded" and sprites is not None:
+            sprites.add(png_url, png_path)
+    if not png_done and not failed and journal is not None:
+        journal.record(pokemon_id, "png")
 
-    if gif_url:
-        gresp = session.get(gif_url)
-        if gresp.status_code == 200:
-            with open(gif_path, "wb") as f:
-                f.write(gresp.content)
-            print(
+    if SyncJournal.reached(resume, "gif") and (not gif_url or os.path.exists(gif_path)):
+        if gif_url and not SyncJournal.reached(resume, "compressed"):
+            # Compression is idempotent, so an interrupted one simply runs again
+            if compressor is not None:
+                compressor.submit(gif_path)
+            else:
+                compress_gif(gif_path)
+    elif gif_url:
+        gif_status = fetch_sprite(session, gif_url, gif_path, "gif", sprites)
+        if gif_status == "reused":
+            log(
+                f"Downloaded data for {pokemon_id} ({pokemon_info.get('name')}), reused stored GIF"
+            )
+            if journal is not None and not failed:
+                journal.record(pokemon_id, "gif")
+        elif gif_status:
+            log(
                 f"Downloaded data and GIF for {pokemon_id} ({pokemon_info.get('name')})"
             )
-            # Compress GIF if it's too large
-            compress_gif(gif_path)
+            if journal is not None and not failed:
+                journal.record(pokemon_id, "gif")
+            # Compress GIF if it's too large; only a GIF that fits is worth reusing
+            if compressor is not None:
+                compressor.submit(gif_path)
+                if sprites is not None:
+
+                    def store(outcome):
+                        if not isinstance(outcome, Exception):
+                            sprites.add(gif_url, gif_path)
+
+                    compressor.then(gif_path, store)
+            else:
+                compress_gif(gif_path)
+                if sprites is not None and not needs_compression(gif_path):
+                    sprites.add(gif_url, gif_path)
         else:
-            print(
+            log(
                 f"Failed to download GIF for {pokemon_id} ({pokemon_info.get('name')}) - URL: {gif_url}"
             )
+            failed = failed or ("gif", f"GIF download failed: {gif_url}")
     else:
-        print(f"No animated GIF for {pokemon_id} ({pokemon_info.get('name')})")
+        log(f"No animated GIF for {pokemon_id} ({pokemon_info.get('name')})")
+        if journal is not None and not failed:
+            journal.record(pokemon_id, "gif")
 
+    if failed:
+        if journal is not None:
+            journal.fail(pokemon_id, *failed, url=pokemon_url)
+        return None
     return pokemon_info
 
 
-def get_all_pokemon_list(session):
-    # Get total count
-    list_url = "https://pokeapi.co/api/v2/pokemon?limit=1"
-    resp = session.get(list_url)
-    if resp.status_code != 200:
-        raise RuntimeError("Failed to fetch pokemon list")
-    count = resp.json().get("count")
+class PokemonListPages:
+    """
+    Lazy walk over the /pokemon list endpoint with offset/limit pages.
+    Iterating yields (index, entry) for the window [start, start + limit),
+    requesting each page only when the previous one has been consumed, so
+    the first entries can be fetched while later pages are still unread.
+    `count` (the catalogue size) is known once the first page arrived.
+    """
 
-    # Fetch all entries
-    resp = session.get(f"https://pokeapi.co/api/v2/pokemon?limit={count}")
-    if resp.status_code != 200:
-        raise RuntimeError("Failed to fetch full pokemon list")
-    return resp.json().get("results", [])
+    def __init__(self, session, start=0, limit=None, page_size=LIST_PAGE_SIZE):
+        self.session = session
+        self.start = start
+        self.limit = limit
+        self.page_size = page_size
+        self.count = None
+
+    @property
+    def end(self):
+        """Index one past the last entry of the window, once count is known."""
+        if self.count is None:
+            return None
+        if self.limit is None:
+            return self.count
+        return min(self.count, self.start + self.limit)
+
+    def __iter__(self):
+        offset = self.start
+        while self.end is None or offset < self.end:
+            size = self.page_size
+            if self.limit is not None:
+                size = min(size, self.start + self.limit - offset)
+            resp = self.session.get(
+                f"{self.session.api_base}/pokemon?offset={offset}&limit={size}",
+                stage="list",
+            )
+            if resp.status_code != 200:
+                raise RuntimeError(f"Failed to fetch pokemon list page at offset {offset}")
+            page = resp.json()
+            self.count = page.get("count", 0)
+            results = page.get("results", [])
+            for i, entry in enumerate(results):
+                yield offset + i, entry
+            offset += len(results)
+            if not results or not page.get("next"):
+                break
+
+
+def run_concurrently(func, jobs, workers):
+    """
+    Run func(*job) for every job on a thread pool.
+    At most 2 * workers jobs are queued at once so large job lists
+    are consumed lazily.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(func, *job))
+            if len(pending) >= 2 * workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    future.result()
+        for future in pending:
+            future.result()
 
 
 def main():
@@ -246,30 +1672,290 @@ def main():
     parser.add_argument(
         "--skip-existing",
         action="store_true",
-        help="Skip entries with existing JSON files",
+        help="Skip entries the sync journal records as complete and resume half-finished ones",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Only re-run the entries the sync journal lists as failed",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of entries to fetch concurrently (default: 1, serial)",
+    )
+    parser.add_argument(
+        "--max-per-host",
+        type=int,
+        default=None,
+        help="Maximum concurrent requests to a single host, lowered automatically "
+        "while the host throttles us (default: --workers)",
+    )
+    parser.add_argument(
+        "--compress-workers",
+        type=int,
+        default=None,
+        help="Processes for GIF compression (default: CPU count, 0: compress inline)",
+    )
+    parser.add_argument(
+        "--gif-budget-kb",
+        type=int,
+        default=GIF_BUDGET // 1024,
+        help="Largest GIF size in KB to ship to the receiver (default: 100)",
+    )
+    parser.add_argument(
+        "--gif-min-height",
+        type=int,
+        default=GIF_MIN_HEIGHT,
+        help="Shrink GIFs below this height only if nothing else fits the budget (default: 40)",
+    )
+    parser.add_argument(
+        "--export-catalog",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="After syncing, pack all entries into a binary catalog (default: pokemon/pokedex.bin)",
+    )
+    parser.add_argument(
+        "--export-frames",
+        action="store_true",
+        help="Also convert each synced GIF into an RGB565 frame stream ({id}.565, needs NumPy)",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Store every sprite separately instead of linking identical ones",
+    )
+    parser.add_argument(
+        "--no-db",
+        action="store_true",
+        help=f"Do not keep the SQLite catalog ({DB_NAME} in the output directory) up to date",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        help="Write per-stage timing, bytes, retries and compression stats as JSON",
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        metavar="PATH",
+        help="Write the same metrics as a Prometheus textfile (for node_exporter)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=POKEMON_DIR,
+        help="Directory to write pokemon data to (default: pokemon)",
+    )
+    parser.add_argument(
+        "--api-base",
+        default=API_BASE,
+        help="PokeAPI base URL (default: https://pokeapi.co/api/v2)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=".http_cache",
+        help="Directory for the HTTP response cache (default: .http_cache)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=1024,
+        help="Evict least recently used cache entries above this size (default: 1024)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the HTTP response cache",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Serve every request from the cache only, without touching the network",
     )
     args = parser.parse_args()
 
-    session = make_session()
+    directory = args.output_dir
+    os.makedirs(directory, exist_ok=True)
 
-    all_entries = get_all_pokemon_list(session)
-    total = len(all_entries)
-    print(f"Total pokemon entries (including forms): {total}")
+    if args.no_cache and args.offline:
+        parser.error("--offline needs the response cache")
+    # Failed entries are known by ID, not by their position in the list
+    if args.retry_failed and (args.limit > 0 or args.start != 1):
+        parser.error("--retry-failed re-runs every failed entry and takes no --start/--limit")
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(
+            args.cache_dir,
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+            offline=args.offline,
+        )
 
-    # Convert 1-based to 0-based index for Python list
-    start_index = max(0, args.start - 1)
-    limit = args.limit if args.limit > 0 else total
+    metrics = FetchMetrics()
+    session = make_session(
+        workers=args.workers,
+        per_host=args.max_per_host,
+        cache=cache,
+        metrics=metrics,
+        api_base=args.api_base,
+    )
 
-    end_index = min(total, start_index + limit)
+    journal = SyncJournal(directory)
+    db = None
+    if not args.no_db:
+        db = PokedexDB(os.path.join(directory, DB_NAME), directory)
+        if not len(db):
+            # First run with the catalog: index what earlier syncs wrote
+            updated, _ = db.sync()
+            if updated:
+                print(f"Indexed {updated} existing entries into {db.path}")
+    if args.retry_failed:
+        # The journal has every URL, so the list endpoint is not needed
+        retry_queue = [entry for entry in journal.failed() if entry.get("url")]
+        all_entries = [
+            {"name": str(entry["id"]), "url": entry["url"]} for entry in retry_queue
+        ]
+        print(f"Retrying {len(all_entries)} failed entries from {journal.path}")
+        listing = None
+        jobs = list(enumerate(all_entries))
+    else:
+        # Convert 1-based ID to a 0-based list offset; pages arrive as needed
+        listing = PokemonListPages(
+            session,
+            start=max(0, args.start - 1),
+            limit=args.limit if args.limit > 0 else None,
+        )
+        jobs = listing
+
+    def end_index():
+        return listing.end if listing is not None else len(all_entries)
+
+    species_store = SpeciesStore(session)
+    sprites = None if args.no_dedup else SpriteStore(directory)
+    synced_ids = []
+    compressor = GifCompressor(
+        workers=args.compress_workers,
+        budget=args.gif_budget_kb * 1024,
+        min_height=args.gif_min_height,
+        metrics=metrics,
+    )
+    skipped = 0
 
-    for idx in range(start_index, end_index):
-        entry = all_entries[idx]
+    def process(idx, entry, resume):
         url = entry.get("url")
-        print(f"Processing {idx+1}/{end_index}: {entry.get('name')} -> {url}")
-        try:
-            fetch_pokemon_data(session, url, skip_existing=args.skip_existing)
-        except Exception as e:
-            print(f"Error processing {entry.get('name')}: {e}")
+        started = time.perf_counter()
+        with entry_log(buffered=args.workers > 1):
+            log(f"Processing {idx+1}/{end_index()}: {entry.get('name')} -> {url}")
+            try:
+                # Already filtered against the journal in pending_jobs()
+                info = fetch_pokemon_data(
+                    session,
+                    url,
+                    skip_existing=False,
+                    species_store=species_store,
+                    compressor=compressor,
+                    journal=journal,
+                    resume=resume,
+                    sprites=sprites,
+                    directory=directory,
+                )
+                metrics.count_entry("ok" if info else "failed")
+                if info:
+                    pokemon_id = info["id"]
+                    gif_path = os.path.join(directory, f"{pokemon_id}.gif")
+                    synced_ids.append(pokemon_id)
+
+                    def finished(outcome):
+                        # Sprite sizes are final once compression is done
+                        if db is not None:
+                            db.upsert(info)
+                        if isinstance(outcome, Exception):
+                            # Keeps the entry at "gif", so a resume compresses again
+                            journal.fail(pokemon_id, "compress", outcome, url=url)
+                        else:
+                            journal.record(pokemon_id, "compressed")
+
+                    compressor.then(gif_path, finished)
+            except Exception as e:
+                metrics.count_entry("failed")
+                log(f"Error processing {entry.get('name')}: {e}")
+                pokemon_id = (resume or {}).get("id") or pokemon_id_from_url(url)
+                if pokemon_id:
+                    journal.fail(pokemon_id, "entry", f"{type(e).__name__}: {e}", url=url)
+        metrics.observe("total", time.perf_counter() - started)
+
+    def pending_jobs():
+        nonlocal skipped
+        for idx, entry in jobs:
+            if listing is not None and idx == listing.start:
+                print(f"Total pokemon entries (including forms): {listing.count}")
+            if not (args.skip_existing or args.retry_failed):
+                yield idx, entry, None
+                continue
+            # Decide from the list URL alone, so completed entries cost no requests
+            pokemon_id = pokemon_id_from_url(entry.get("url"))
+            if not args.retry_failed and journal.is_complete(pokemon_id):
+                skipped += 1
+                metrics.count_entry("skipped")
+                continue
+            yield idx, entry, journal.get(pokemon_id)
+
+    try:
+        if args.workers > 1:
+            run_concurrently(process, pending_jobs(), args.workers)
+        else:
+            for idx, entry, resume in pending_jobs():
+                process(idx, entry, resume)
+    finally:
+        compressor.close()
+        journal.close()
+        if sprites is not None:
+            sprites.save()
+        if db is not None:
+            db.close()
+
+    if skipped:
+        print(f"Skipped {skipped} entries already complete in {journal.path}")
+    failed = journal.failed()
+    if failed:
+        print(
+            f"{len(failed)} entries failed (IDs: {', '.join(str(e['id']) for e in failed[:20])}"
+            f"{', ...' if len(failed) > 20 else ''}); re-run them with --retry-failed"
+        )
+    if args.export_frames:
+        # NumPy is only needed for this export, so import it on demand
+        from export_frames import export_directory, format_report
+
+        for report in export_directory(directory, ids=sorted(synced_ids)):
+            print(format_report(report))
+
+    if args.export_catalog is not None:
+        catalog_path = args.export_catalog or os.path.join(directory, "pokedex.bin")
+        count = build_catalog(directory, catalog_path)
+        print(f"Packed {count} entries into {catalog_path}")
+
+    if sprites is not None and sprites.summary():
+        print(sprites.summary())
+    compression_summary = compressor.summary()
+    if compression_summary:
+        print(compression_summary)
+    if species_store.reused:
+        print(
+            f"Species data: {species_store.fetched} fetched, "
+            f"{species_store.reused} shared between forms"
+        )
+
+    host_summary = session.host_limiter.summary()
+    if host_summary:
+        print(host_summary)
+    print(metrics.format_summary())
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+        print(f"Metrics summary written to {args.metrics_json}")
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
+        print(f"Prometheus metrics written to {args.metrics_prom}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+"""
+Derived image assets for create_poster.py
+The keyed Pokeball logo and the sprite thumbnails only depend on their
+source file and target size, so they are kept in an on-disk cache keyed by
+the source's SHA-256 and that size. Re-rendering a poster then only decodes
+small, already resampled PNGs instead of every full-size artwork.
+"""
+
+import os
+import hashlib
+import tempfile
+from PIL import Image, ImageChops
+
+DEFAULT_CACHE_DIR = ".poster_cache"
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Bump when the way an asset is derived changes, so stale entries are not reused
+ASSET_VERSION = 1
+
+# Logo pixels at least this bright in R, G and B are treated as background
+WHITE_THRESHOLD = 245
+
+# mkstemp creates files as 0600; cached assets get the mode open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def key_white_background(img, threshold=WHITE_THRESHOLD):
+    """
+    Return an RGBA copy of img with near-white pixels made transparent white,
+    using whole-image band operations instead of a per-pixel loop.
+    """
+    img = img.convert("RGBA")
+    r, g, b, _ = img.split()
+    lut = [255 if v >= threshold else 0 for v in range(256)]
+    white = ImageChops.multiply(
+        ImageChops.multiply(r.point(lut), g.point(lut)), b.point(lut)
+    )
+    clear = Image.new("RGBA", img.size, (255, 255, 255, 0))
+    return Image.composite(clear, img, white)
+
+
+class AssetCache:
+    """
+    Size-bounded on-disk cache of derived RGBA images, stored as PNG.
+    Entries are named after the SHA-256 of their source file, the kind of
+    derivation and the target size; the least recently used ones are
+    evicted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._hashes = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def source_hash(self, path):
+        """SHA-256 of a source file, remembered per (path, size, mtime)."""
+        stat = os.stat(path)
+        memo_key = (path, stat.st_size, stat.st_mtime_ns)
+        digest = self._hashes.get(memo_key)
+        if digest is None:
+            digest = file_sha256(path)
+            self._hashes[memo_key] = digest
+        return digest
+
+    def path_for(self, source_path, kind, size):
+        name = f"{self.source_hash(source_path)}-{kind}-{size[0]}x{size[1]}-v{ASSET_VERSION}.png"
+        return os.path.join(self.directory, name)
+
+    def get(self, source_path, kind, size, build):
+        """
+        Return the cached derivation of source_path, or build(source_path)
+        and store it. The result is always a loaded RGBA image.
+        """
+        cached_path = self.path_for(source_path, kind, size)
+        try:
+            with Image.open(cached_path) as cached:
+                img = cached.convert("RGBA")
+            # Mark as recently used for eviction
+            os.utime(cached_path)
+            self.hits += 1
+            return img
+        except (OSError, ValueError):
+            pass
+
+        img = build(source_path)
+        self.misses += 1
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                # Favour speed: these files are small and rewritten rarely
+                img.save(f, "PNG", compress_level=1)
+            os.chmod(tmp_path, FILE_MODE)
+            os.replace(tmp_path, cached_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return img
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".png"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def _thumbnail(path, size):
+    img = Image.open(path)
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    img.thumbnail(size, Image.Resampling.LANCZOS)
+    return img
+
+
+def load_thumbnail(path, size, cache=None):
+    """Sprite at path as RGBA, thumbnailed (LANCZOS) to fit a size x size box."""
+    box = (size, size)
+    if cache is None:
+        return _thumbnail(path, box)
+    return cache.get(path, "thumb", box, lambda p: _thumbnail(p, box))
+
+
+def _keyed_logo(path, box):
+    img = key_white_background(Image.open(path))
+    img.thumbnail(box, Image.Resampling.LANCZOS)
+    return img
+
+
+def load_logo(path, width, height, cache=None):
+    """Logo at path with its white background keyed out, fit into width x height."""
+    box = (width, height)
+    if cache is None:
+        return _keyed_logo(path, box)
+    return cache.get(path, "logo", box, lambda p: _keyed_logo(p, box))
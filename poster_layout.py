@@ -0,0 +1,256 @@
+"""
+Poster layouts for create_poster.py
+A layout turns a list of Pokemon IDs and a paper size into cells: the
+position and size of every sprite (and the logo) on the poster. The classic
+151 poster is the CLASSIC_151 preset; any other ID set is packed into the
+grid that gives the largest sprites on the chosen paper.
+"""
+
+import os
+import math
+
+DPI = 300
+# Portrait paper sizes in cm
+PAPER_SIZES = {
+    "A0": (84.1, 118.9),
+    "A1": (59.4, 84.1),
+    "A2": (42.0, 59.4),
+    "A3": (29.7, 42.0),
+    "A4": (21.0, 29.7),
+}
+BORDER_WIDTH = 150
+# Caption font size and the room kept below a sprite for its caption at that size
+CAPTION_FONT_SIZE = 36
+CAPTION_SPACE = 85
+MIN_CAPTION_FONT_SIZE = 10
+# Horizontal room left around a sprite in a packed grid
+GRID_PADDING = 10
+# Space above a sprite in its cell, and between a sprite and its caption
+SPRITE_MARGIN = 10
+CAPTION_GAP = 15
+
+# National Dex ranges per generation
+GENERATIONS = {
+    1: (1, 151),
+    2: (152, 251),
+    3: (252, 386),
+    4: (387, 493),
+    5: (494, 649),
+    6: (650, 721),
+    7: (722, 809),
+    8: (810, 905),
+    9: (906, 1025),
+}
+
+# In an ID sequence, the cell holding the Pokeball logo
+LOGO = None
+
+# The original poster: 6 Pokemon around the logo, then rows of 10 and 9.
+# Rows are (number of rows, columns, horizontal padding of the sprite box)
+CLASSIC_151 = {
+    "name": "classic",
+    "ids": [1, 2, 3, LOGO, 4, 5, 6] + list(range(7, 152)),
+    "rows": [(1, 7, 20), (10, 10, 10), (5, 9, 15)],
+}
+
+
+def paper_pixels(paper, dpi=DPI):
+    """(width, height) in pixels of a paper size from PAPER_SIZES."""
+    width_cm, height_cm = PAPER_SIZES[paper]
+    return int(width_cm * dpi / 2.54), int(height_cm * dpi / 2.54)
+
+
+def parse_ids(spec):
+    """IDs from a spec like '1-151,250', in the order given, without duplicates."""
+    ids = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        start = int(first)
+        end = int(last) if last else start
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid ID range: {part}")
+        ids.extend(range(start, end + 1))
+    return list(dict.fromkeys(ids))
+
+
+def format_ids(ids):
+    """Compact form of a list of IDs, e.g. '#50, #152-160'."""
+    parts = []
+    ids = sorted(ids)
+    i = 0
+    while i < len(ids):
+        j = i
+        while j + 1 < len(ids) and ids[j + 1] == ids[j] + 1:
+            j += 1
+        parts.append(f"#{ids[i]}" if i == j else f"#{ids[i]}-{ids[j]}")
+        i = j + 1
+    return ", ".join(parts)
+
+
+def scan_sprites(directory="pokemon"):
+    """IDs that have a {id}.png in directory, from a single directory listing."""
+    available = set()
+    if not os.path.isdir(directory):
+        return available
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext == ".png" and stem.isdigit():
+                available.add(int(stem))
+    return available
+
+
+def _cell(row, cell_id, x, y, width, height, size):
+    return {
+        "row": row,
+        "id": cell_id,
+        "x": x,
+        "y": y,
+        "width": width,
+        "height": height,
+        "size": size,
+        "sprite_y": y + SPRITE_MARGIN,
+        "caption_gap": CAPTION_GAP,
+    }
+
+
+def preset_layout(preset, width, height, border=BORDER_WIDTH):
+    """
+    Cells of a preset on a width x height poster. Every row group splits the
+    grid width evenly over its columns; all rows share the grid height.
+    """
+    grid_width = width - 2 * border
+    grid_height = height - 2 * border
+    total_rows = sum(count for count, _, _ in preset["rows"])
+    row_height = grid_height // total_rows
+    ids = iter(preset["ids"])
+
+    cells = []
+    row = 1
+    for count, columns, padding in preset["rows"]:
+        cell_width = grid_width // columns
+        size = min(cell_width - padding, row_height - CAPTION_SPACE)
+        for _ in range(count):
+            for col in range(columns):
+                cell_id = next(ids, False)
+                if cell_id is False:
+                    break
+                cells.append(
+                    _cell(
+                        row,
+                        cell_id,
+                        border + col * cell_width,
+                        border + (row - 1) * row_height,
+                        cell_width,
+                        row_height,
+                        size,
+                    )
+                )
+            row += 1
+    return {
+        "name": preset["name"],
+        "width": width,
+        "height": height,
+        "rows": total_rows,
+        "font_size": CAPTION_FONT_SIZE,
+        "border": border,
+        "scale": 1,
+        "cells": cells,
+    }
+
+
+def caption_font_size(cell_width):
+    """Caption font size for a cell width, so a typical caption stays inside its cell."""
+    return max(MIN_CAPTION_FONT_SIZE, min(CAPTION_FONT_SIZE, cell_width // 8))
+
+
+def grid_layout(ids, width, height, logo=True, border=BORDER_WIDTH):
+    """
+    Pack ids (plus the logo, centred in the first row) into the uniform
+    grid that gives the largest sprites on a width x height poster.
+    Raises ValueError when they cannot fit.
+    """
+    count = len(ids) + (1 if logo else 0)
+    if count == 0:
+        raise ValueError("No Pokemon to lay out")
+    grid_width = width - 2 * border
+    grid_height = height - 2 * border
+
+    best = None
+    for columns in range(1, count + 1):
+        rows = math.ceil(count / columns)
+        cell_width = grid_width // columns
+        row_height = grid_height // rows
+        font_size = caption_font_size(cell_width)
+        caption_space = CAPTION_SPACE * font_size // CAPTION_FONT_SIZE
+        size = min(cell_width - GRID_PADDING, row_height - caption_space)
+        if best is None or size > best[0]:
+            best = (size, columns, rows, cell_width, row_height, font_size)
+    size, columns, rows, cell_width, row_height, font_size = best
+    if size < 1:
+        raise ValueError(f"{len(ids)} Pokemon do not fit on a {width}x{height} poster")
+
+    sequence = list(ids)
+    if logo:
+        sequence.insert(min(columns, count) // 2, LOGO)
+    cells = []
+    for index, cell_id in enumerate(sequence):
+        row, col = divmod(index, columns)
+        cells.append(
+            _cell(
+                row + 1,
+                cell_id,
+                border + col * cell_width,
+                border + row * row_height,
+                cell_width,
+                row_height,
+                size,
+            )
+        )
+    return {
+        "name": "grid",
+        "width": width,
+        "height": height,
+        "rows": rows,
+        "font_size": font_size,
+        "border": border,
+        "scale": 1,
+        "cells": cells,
+    }
+
+
+def scale_layout(layout, scale):
+    """
+    The same layout for rendering at scale times its resolution, e.g. 0.1
+    for a 30 DPI preview of a 300 DPI poster. Positions are scaled from the
+    full-size geometry, so the preview shows exactly the final layout.
+    """
+
+    def length(value):
+        return max(1, round(value * scale))
+
+    cells = [
+        dict(
+            cell,
+            x=round(cell["x"] * scale),
+            y=round(cell["y"] * scale),
+            width=length(cell["width"]),
+            height=length(cell["height"]),
+            size=length(cell["size"]),
+            sprite_y=round(cell["sprite_y"] * scale),
+            caption_gap=round(cell["caption_gap"] * scale),
+        )
+        for cell in layout["cells"]
+    ]
+    return dict(
+        layout,
+        width=length(layout["width"]),
+        height=length(layout["height"]),
+        font_size=length(layout["font_size"]),
+        border=length(layout["border"]),
+        scale=layout["scale"] * scale,
+        cells=cells,
+    )
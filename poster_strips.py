@@ -0,0 +1,164 @@
+"""
+Streaming PNG and TIFF writers for create_poster.py's strip mode
+The poster is rendered as horizontal bands of whole pixel rows; each band is
+filtered and deflated into the open file as soon as it is done, so memory
+use depends on the band height rather than the poster size.
+- PNG: one zlib stream over all bands, written as IDAT chunks, with the PNG
+  "Up" filter computed band-wide with ImageChops.
+- TIFF: every band is one LZW-compressed strip (TIFF compression 5), the
+  same codec as the in-memory "tiff_lzw" save; Pillow encodes the band and
+  its strip is copied out. The directory is written at the end and linked
+  from the header.
+JPEG has no way to take the image piecewise in Pillow, so strip mode does
+not produce one.
+"""
+
+import io
+import zlib
+import struct
+from PIL import Image, ImageChops
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_FILTER_UP = b"\x02"
+
+
+class PNGStripWriter:
+    """Write an 8-bit RGB PNG band by band, top to bottom."""
+
+    def __init__(self, path, width, height, compress_level=6):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.rows = 0
+        self._previous_row = None
+        self._compressor = zlib.compressobj(compress_level)
+        self._file = open(path, "wb")
+        self._file.write(PNG_SIGNATURE)
+        # 8 bits per sample, color type 2 (RGB), deflate, adaptive filtering, no interlace
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def _chunk(self, kind, data):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(kind)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+    def write(self, band):
+        """Append band, an RGB image as wide as the poster."""
+        # Up filter: every row minus the row above it, modulo 256
+        above = Image.new("RGB", band.size)
+        if self._previous_row is not None:
+            above.paste(self._previous_row, (0, 0))
+        above.paste(band.crop((0, 0, band.width, band.height - 1)), (0, 1))
+        filtered = ImageChops.subtract_modulo(band, above).tobytes()
+        self._previous_row = band.crop((0, band.height - 1, band.width, band.height))
+
+        stride = band.width * 3
+        view = memoryview(filtered)
+        scanlines = b"".join(
+            PNG_FILTER_UP + view[i : i + stride] for i in range(0, len(filtered), stride)
+        )
+        data = self._compressor.compress(scanlines)
+        if data:
+            self._chunk(b"IDAT", data)
+        self.rows += band.height
+
+    def close(self):
+        if self.rows != self.height:
+            self._file.close()
+            raise ValueError(f"{self.path}: wrote {self.rows} of {self.height} rows")
+        self._chunk(b"IDAT", self._compressor.flush())
+        self._chunk(b"IEND", b"")
+        self._file.close()
+
+
+class TIFFStripWriter:
+    """
+    Write an 8-bit RGB TIFF band by band, top to bottom. Every band but the
+    last must be rows_per_strip high.
+    """
+
+    def __init__(self, path, width, height, rows_per_strip):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.rows_per_strip = rows_per_strip
+        self.rows = 0
+        self._offsets = []
+        self._byte_counts = []
+        self._file = open(path, "wb")
+        # Little-endian header; the directory offset is patched in by close()
+        self._file.write(b"II*\x00" + struct.pack("<I", 0))
+
+    def write(self, band):
+        """Append band, an RGB image as wide as the poster."""
+        if self.rows + band.height < self.height and band.height != self.rows_per_strip:
+            self._file.close()
+            raise ValueError(f"{self.path}: strips must be {self.rows_per_strip} rows high")
+        data = self._encode(band)
+        self._offsets.append(self._file.tell())
+        self._byte_counts.append(len(data))
+        self._file.write(data)
+        self.rows += band.height
+
+    def _encode(self, band):
+        """The band LZW-encoded as a single TIFF strip, taken from a one-strip TIFF by Pillow."""
+        buffer = io.BytesIO()
+        band.save(
+            buffer, "TIFF", compression="tiff_lzw", strip_size=band.width * 3 * band.height
+        )
+        with Image.open(buffer) as encoded:
+            offsets = encoded.tag_v2[273]
+            byte_counts = encoded.tag_v2[279]
+        if len(offsets) != 1:
+            self._file.close()
+            raise ValueError(f"{self.path}: Pillow split a band into {len(offsets)} strips")
+        return buffer.getbuffer()[offsets[0] : offsets[0] + byte_counts[0]]
+
+    def _array(self, fmt, values):
+        """Write values out of line (word aligned) and return their offset."""
+        if self._file.tell() % 2:
+            self._file.write(b"\x00")
+        offset = self._file.tell()
+        self._file.write(struct.pack(f"<{len(values)}{fmt}", *values))
+        return offset
+
+    def close(self):
+        if self.rows != self.height:
+            self._file.close()
+            raise ValueError(f"{self.path}: wrote {self.rows} of {self.height} rows")
+        strips = len(self._offsets)
+        bits_offset = self._array("H", [8, 8, 8])
+        if strips == 1:
+            offsets_value, counts_value = self._offsets[0], self._byte_counts[0]
+        else:
+            offsets_value = self._array("I", self._offsets)
+            counts_value = self._array("I", self._byte_counts)
+
+        # (tag, type, count, value): type 3 is SHORT, 4 is LONG
+        entries = [
+            (256, 4, 1, self.width),  # ImageWidth
+            (257, 4, 1, self.height),  # ImageLength
+            (258, 3, 3, bits_offset),  # BitsPerSample
+            (259, 3, 1, 5),  # Compression: LZW
+            (262, 3, 1, 2),  # PhotometricInterpretation: RGB
+            (273, 4, strips, offsets_value),  # StripOffsets
+            (277, 3, 1, 3),  # SamplesPerPixel
+            (278, 4, 1, self.rows_per_strip),  # RowsPerStrip
+            (279, 4, strips, counts_value),  # StripByteCounts
+            (284, 3, 1, 1),  # PlanarConfiguration: contiguous
+        ]
+        if self._file.tell() % 2:
+            self._file.write(b"\x00")
+        directory_offset = self._file.tell()
+        self._file.write(struct.pack("<H", len(entries)))
+        for tag, kind, count, value in entries:
+            if kind == 3 and count == 1:
+                value_bytes = struct.pack("<HH", value, 0)
+            else:
+                value_bytes = struct.pack("<I", value)
+            self._file.write(struct.pack("<HHI", tag, kind, count) + value_bytes)
+        self._file.write(struct.pack("<I", 0))
+        self._file.seek(4)
+        self._file.write(struct.pack("<I", directory_offset))
+        self._file.close()